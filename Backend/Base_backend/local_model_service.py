@@ -392,6 +392,8 @@ class LocalArabicModel:
                 # Set pad token if not set
                 if self.tokenizer.pad_token is None:
                     self.tokenizer.pad_token = self.tokenizer.eos_token
+                # Decoder-only generation needs left padding for batched prompts
+                self.tokenizer.padding_side = "left"
                 
                 logger.info("Tokenizer loaded successfully")
                 
@@ -517,6 +519,64 @@ class LocalArabicModel:
             logger.error(traceback.format_exc())
             raise
     
+    def generate_batch(
+        self,
+        prompts: List[str],
+        max_new_tokens: int = 512,
+        temperature: float = 0.7,
+        top_p: float = 0.9
+    ) -> List[str]:
+        """
+        Generate responses for several prompts in one padded forward pass
+        
+        Args:
+            prompts: User input prompts
+            max_new_tokens: Maximum tokens to generate per prompt
+            temperature: Sampling temperature
+            top_p: Nucleus sampling parameter
+        
+        Returns:
+            Generated response texts, in prompt order
+        """
+        if len(prompts) == 1:
+            return [self.generate(prompts[0], max_new_tokens, temperature, top_p)]
+        
+        self.ensure_loaded()
+        
+        if not self._is_loaded or self.model is None or self.tokenizer is None:
+            raise RuntimeError("Model not loaded. Cannot generate response.")
+        
+        try:
+            inputs = self.tokenizer(
+                [self._format_prompt(prompt) for prompt in prompts],
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=2048  # Limit input length
+            ).to(self.device)
+            
+            with torch.no_grad():
+                outputs = self.model.generate(
+                    **inputs,
+                    max_new_tokens=max_new_tokens,
+                    temperature=temperature,
+                    top_p=top_p,
+                    do_sample=True,
+                    pad_token_id=self.tokenizer.pad_token_id,
+                    eos_token_id=self.tokenizer.eos_token_id,
+                )
+            
+            # Prompts are left-padded to the same width; everything after it is generated
+            prompt_width = inputs['input_ids'].shape[1]
+            return [
+                text.strip()
+                for text in self.tokenizer.batch_decode(outputs[:, prompt_width:], skip_special_tokens=True)
+            ]
+            
+        except Exception as e:
+            logger.error(f"Error during batched generation: {e}")
+            raise
+    
     def is_loaded(self) -> bool:
         """Check if model is loaded"""
         return self._is_loaded
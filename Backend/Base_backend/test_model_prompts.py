@@ -8,16 +8,20 @@ import os
 import time
 from pathlib import Path
 
-# Set UTF-8 encoding for Windows console
-if sys.platform == 'win32':
+
+def _setup_console():
+    """Switch the Windows console to UTF-8 so Arabic prompts print correctly"""
+    if sys.platform != 'win32':
+        return
     import io
-    import codecs
-    try:
-        # Set Windows console to UTF-8 code page
-        import subprocess
-        subprocess.run(['chcp', '65001'], shell=True, capture_output=True)
-    except:
-        pass
+    # Changing the code page only matters for an interactive console
+    if sys.stdout.isatty():
+        try:
+            # Set Windows console to UTF-8 code page
+            import subprocess
+            subprocess.run(['chcp', '65001'], shell=True, capture_output=True)
+        except:
+            pass
     
     try:
         # Set UTF-8 for stdout and stderr
@@ -31,7 +35,9 @@ if sys.platform == 'win32':
     except Exception as e:
         # If that fails, try setting environment variable
         os.environ['PYTHONIOENCODING'] = 'utf-8'
-        pass
+
+
+_setup_console()
 
 # Force unbuffered output
 try:
@@ -91,7 +97,6 @@ try:
     print("      This may take 1-3 minutes on CPU (first time downloads ~2GB)...")
     print("      Please be patient - the model is downloading/loading...")
     print("      Progress will be shown below:")
-    sys.stdout.flush()
     
     start_time = time.time()
     
@@ -103,44 +108,65 @@ try:
         print("      [TIP] Watch for progress messages below...")
         sys.stdout.flush()
         
-        # Add periodic heartbeat to show script is still running
+        # Add periodic heartbeat to show script is still running.
+        # On POSIX an interval timer signal drives it, so no thread is needed;
+        # elsewhere each threading.Timer tick schedules the next one.
+        # It is skipped entirely when nobody is watching (CI, redirected output).
+        import signal
         import threading
         heartbeat_stop = threading.Event()
         heartbeat_count = [0]  # Use list to allow modification from nested function
+        use_itimer = hasattr(signal, 'setitimer')
         
-        def heartbeat():
-            import time
-            while not heartbeat_stop.is_set():
-                time.sleep(10)
-                heartbeat_count[0] += 1
-                elapsed = heartbeat_count[0] * 10
-                # Check if model is loaded, but don't rely on it exclusively
-                try:
-                    loaded = model.is_loaded()
-                except:
-                    loaded = False
-                
-                if not loaded:
-                    print(f"      [STATUS] Still loading... ({elapsed}s elapsed - this is normal, please wait)")
-                    sys.stdout.flush()
-                else:
-                    break
+        def heartbeat(*_):
+            if heartbeat_stop.is_set():
+                return
+            heartbeat_count[0] += 1
+            elapsed = heartbeat_count[0] * 10
+            # Check if model is loaded, but don't rely on it exclusively
+            try:
+                loaded = model.is_loaded()
+            except:
+                loaded = False
+            
+            if loaded:
+                stop_heartbeat()
+                return
+            print(f"      [STATUS] Still loading... ({elapsed}s elapsed - this is normal, please wait)")
+            if not use_itimer:
+                schedule_heartbeat()
         
-        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
-        heartbeat_thread.start()
-        print("      [INFO] Heartbeat started - you'll see status updates every 10 seconds")
-        print("      [INFO] If you don't see heartbeat messages, the script may have crashed")
-        sys.stdout.flush()
+        def schedule_heartbeat():
+            timer = threading.Timer(10, heartbeat)
+            timer.daemon = True
+            timer.start()
+        
+        def start_heartbeat():
+            if use_itimer:
+                signal.signal(signal.SIGALRM, heartbeat)
+                signal.setitimer(signal.ITIMER_REAL, 10, 10)
+            else:
+                schedule_heartbeat()
+        
+        def stop_heartbeat():
+            heartbeat_stop.set()
+            if use_itimer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        
+        if sys.stdout.isatty() and not os.environ.get('CI'):
+            start_heartbeat()
+            print("      [INFO] Heartbeat started - you'll see status updates every 10 seconds")
+            print("      [INFO] If you don't see heartbeat messages, the script may have crashed")
         
         try:
             model.ensure_loaded()
-            heartbeat_stop.set()
+            stop_heartbeat()
         except KeyboardInterrupt:
-            heartbeat_stop.set()
+            stop_heartbeat()
             print("\n      [INFO] Loading interrupted by user")
             raise
         except Exception as e:
-            heartbeat_stop.set()
+            stop_heartbeat()
             print(f"\n      [ERROR] Exception during loading: {type(e).__name__}: {e}")
             import traceback
             traceback.print_exc()
@@ -155,7 +181,6 @@ try:
         
         print(f"\n[OK] Model loaded successfully!")
         print(f"     Total loading time: {load_time:.1f} seconds ({load_time/60:.1f} minutes)")
-        sys.stdout.flush()
         
     except MemoryError as e:
         print(f"\n[FAIL] Out of memory error during model loading!")
@@ -282,7 +307,6 @@ for i, test in enumerate(test_prompts, 1):
         continue
     
     print()  # Blank line between tests
-    sys.stdout.flush()
 
 print("\n" + "=" * 70)
 print("Test Summary")
@@ -10,13 +10,15 @@ from pathlib import Path
 # Add to path
 sys.path.insert(0, str(Path(__file__).parent))
 
+# Line-buffered stdout flushes on every newline, so output shows up immediately
+try:
+    sys.stdout.reconfigure(line_buffering=True)
+except:
+    pass  # If stdout is not reconfigurable, continue
+
 def safe_print(msg):
-    """Print with immediate flush"""
+    """Print a progress line (flushed by line buffering)"""
     print(msg)
-    try:
-        sys.stdout.flush()
-    except:
-        pass
 
 safe_print("=" * 60)
 safe_print("Simple Arabic Model Test")
@@ -6,7 +6,8 @@ Detects YouTube link requests and appends actual YouTube search/video links
 import re
 import logging
 import urllib.parse
-from typing import Optional, List
+from functools import lru_cache
+from typing import Optional, List, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,45 @@ YOUTUBE_KEYWORDS = [
     'give me', 'show me', 'find me', 'أعطني', 'أعرض لي', 'ابحث لي'
 ]
 
+# Phrases that explicitly ask for a link
+_LINK_PHRASES = (
+    'give me link', 'show me link', 'find link', 'get link',
+    'أعطني رابط', 'أعرض رابط', 'ابحث عن رابط'
+)
+
+# Request phrases stripped from the prompt before topic extraction, in order.
+# Word boundaries avoid partial matches.
+_REMOVE_PHRASES = (
+    'i want to learn', 'give me', 'show me', 'find me', 'get me',
+    'youtube', 'link', 'links', 'video', 'videos', 'channel', 'channels',
+    'some', 'please', 'about', 'to', 'for', 'the', 'a', 'an',
+    'أريد أن أتعلم', 'أعطني', 'أعرض لي', 'ابحث لي', 'رابط', 'فيديو', 'يوتيوب',
+    'من فضلك', 'بعض', 'حول', 'إلى', 'ل'
+)
+_REMOVE_PHRASE_RES = tuple(
+    re.compile(r'\b' + re.escape(phrase) + r'\b', re.IGNORECASE) for phrase in _REMOVE_PHRASES
+)
+
+# Filler words never used as part of a topic
+_COMMON_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'})
+
+_YT_SEARCH_BASE = "https://www.youtube.com/results?search_query="
+
+# Header/footer of the appended links section, per language
+_LINKS_SECTION_TEXT = {
+    'ar': (
+        "**روابط يوتيوب للبحث عن '{topic}':**\n\n",
+        "\nانقر على الروابط أعلاه للعثور على مقاطع الفيديو التعليمية.",
+    ),
+    'en': (
+        "**YouTube Links for '{topic}':**\n\n",
+        "\nClick on the links above to find educational videos.",
+    ),
+}
+
+# Translate table that deletes every character in the Arabic block (U+0600-U+06FF)
+_ARABIC_DELETE_TABLE = dict.fromkeys(range(0x0600, 0x0700))
+
 def detect_youtube_request(prompt: str) -> bool:
     """
     Detect if the user is asking for YouTube links
@@ -27,17 +67,16 @@ def detect_youtube_request(prompt: str) -> bool:
     Returns:
         True if YouTube links are requested, False otherwise
     """
-    prompt_lower = prompt.lower()
-    
+    return _detect_youtube_request(prompt.lower())
+
+
+def _detect_youtube_request(prompt_lower: str) -> bool:
+    """Same as detect_youtube_request, for an already-lowercased prompt."""
     # Check for YouTube-related keywords
     has_youtube_keyword = any(keyword in prompt_lower for keyword in YOUTUBE_KEYWORDS)
     
     # Check for link-related phrases
-    link_phrases = [
-        'give me link', 'show me link', 'find link', 'get link',
-        'أعطني رابط', 'أعرض رابط', 'ابحث عن رابط'
-    ]
-    has_link_phrase = any(phrase in prompt_lower for phrase in link_phrases)
+    has_link_phrase = any(phrase in prompt_lower for phrase in _LINK_PHRASES)
     
     return has_youtube_keyword or has_link_phrase
 
@@ -52,29 +91,23 @@ def extract_topic(prompt: str) -> Optional[str]:
     Returns:
         Extracted topic or None
     """
-    # Remove common phrases
-    cleaned = prompt.lower()
+    return _extract_topic(prompt.lower())
+
+
+def _extract_topic(prompt_lower: str) -> Optional[str]:
+    """Same as extract_topic, for an already-lowercased prompt."""
+    cleaned = prompt_lower
     
     # Remove common request phrases (more comprehensive)
-    remove_phrases = [
-        'i want to learn', 'give me', 'show me', 'find me', 'get me',
-        'youtube', 'link', 'links', 'video', 'videos', 'channel', 'channels',
-        'some', 'please', 'about', 'to', 'for', 'the', 'a', 'an',
-        'أريد أن أتعلم', 'أعطني', 'أعرض لي', 'ابحث لي', 'رابط', 'فيديو', 'يوتيوب',
-        'من فضلك', 'بعض', 'حول', 'إلى', 'ل'
-    ]
-    
-    for phrase in remove_phrases:
-        # Use word boundaries to avoid partial matches
-        cleaned = re.sub(r'\b' + re.escape(phrase) + r'\b', '', cleaned, flags=re.IGNORECASE)
+    for phrase_re in _REMOVE_PHRASE_RES:
+        cleaned = phrase_re.sub('', cleaned)
     
     # Remove punctuation and extra spaces
     cleaned = re.sub(r'[^\w\s]', ' ', cleaned)
     cleaned = re.sub(r'\s+', ' ', cleaned).strip()
     
     # Extract remaining meaningful words (2+ characters, not common words)
-    common_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
-    words = [w.strip() for w in cleaned.split() if len(w.strip()) > 1 and w.strip() not in common_words]
+    words = [w.strip() for w in cleaned.split() if len(w.strip()) > 1 and w.strip() not in _COMMON_WORDS]
     
     if words:
         # Take first few meaningful words as topic (limit to 3 words for better search)
@@ -84,6 +117,18 @@ def extract_topic(prompt: str) -> Optional[str]:
     return None
 
 
+def _encode_search_query(topic: str) -> str:
+    """
+    Encode a topic for the search_query parameter
+    
+    Plain ASCII words only need spaces turned into '+', so the full
+    quote_plus machinery is reserved for everything else.
+    """
+    if topic.isascii() and topic.replace(' ', '').isalnum():
+        return topic.replace(' ', '+')
+    return urllib.parse.quote_plus(topic)
+
+
 def generate_youtube_links(topic: str, language: str = 'en') -> List[dict]:
     """
     Generate YouTube search links for a given topic
@@ -95,41 +140,54 @@ def generate_youtube_links(topic: str, language: str = 'en') -> List[dict]:
     Returns:
         List of dictionaries with 'label' and 'url' keys
     """
-    if not topic:
-        return []
+    return [{"label": label, "url": url} for label, url in _youtube_link_pairs(topic, language)]
+
+
+@lru_cache(maxsize=1024)
+def _youtube_link_pairs(topic: str, language: str = 'en') -> Tuple[Tuple[str, str], ...]:
+    """
+    Cached core of generate_youtube_links, returning (label, url) pairs
     
-    # Clean topic for URL encoding
-    search_query_encoded = urllib.parse.quote(topic)
-    search_query_plus = topic.replace(' ', '+')
+    Chat sessions tend to circle one subject, so the same topic is
+    requested repeatedly; the result is immutable so it can be shared.
+    """
+    if not topic:
+        return ()
     
-    links = []
+    # Encode the topic once; the tutorial/course variants append to it
+    search_query = _encode_search_query(topic)
     
     # Main search link
-    main_url = f"https://www.youtube.com/results?search_query={search_query_encoded}"
-    if language == 'ar':
-        links.append({"label": f"البحث عن '{topic}'", "url": main_url})
-    else:
-        links.append({"label": f"Search for '{topic}'", "url": main_url})
-    
+    main_url = f"{_YT_SEARCH_BASE}{search_query}"
     # Tutorial-specific search
-    tutorial_query = f"{topic}+tutorial"
-    tutorial_encoded = urllib.parse.quote(tutorial_query)
-    tutorial_url = f"https://www.youtube.com/results?search_query={tutorial_encoded}"
-    if language == 'ar':
-        links.append({"label": f"دروس '{topic}'", "url": tutorial_url})
-    else:
-        links.append({"label": f"'{topic}' Tutorials", "url": tutorial_url})
-    
+    tutorial_url = f"{_YT_SEARCH_BASE}{search_query}+tutorial"
     # Course-specific search
-    course_query = f"{topic}+course"
-    course_encoded = urllib.parse.quote(course_query)
-    course_url = f"https://www.youtube.com/results?search_query={course_encoded}"
+    course_url = f"{_YT_SEARCH_BASE}{search_query}+course"
+    
     if language == 'ar':
-        links.append({"label": f"دورة '{topic}'", "url": course_url})
-    else:
-        links.append({"label": f"'{topic}' Course", "url": course_url})
+        return (
+            (f"البحث عن '{topic}'", main_url),
+            (f"دروس '{topic}'", tutorial_url),
+            (f"دورة '{topic}'", course_url),
+        )
+    return (
+        (f"Search for '{topic}'", main_url),
+        (f"'{topic}' Tutorials", tutorial_url),
+        (f"'{topic}' Course", course_url),
+    )
+
+
+def _has_arabic(text: str) -> bool:
+    """
+    Check whether text contains any Arabic characters
     
-    return links[:3]  # Return top 3 links
+    Text made only of characters below the Arabic block is rejected by
+    max() alone; otherwise str.translate drops the Arabic block in C and
+    a change in length means at least one Arabic character was present.
+    """
+    if not text or max(text) < '\u0600':
+        return False
+    return len(text.translate(_ARABIC_DELETE_TABLE)) != len(text)
 
 
 def append_youtube_links(response: str, prompt: str) -> str:
@@ -143,23 +201,26 @@ def append_youtube_links(response: str, prompt: str) -> str:
     Returns:
         Response with YouTube links appended if applicable
     """
+    # Lowercase once and share it with the helpers below
+    prompt_lower = prompt.lower()
+    
     # Check if YouTube links are requested
-    if not detect_youtube_request(prompt):
+    if not _detect_youtube_request(prompt_lower):
         return response
     
     # Extract topic
-    topic = extract_topic(prompt)
+    topic = _extract_topic(prompt_lower)
     
     if not topic:
         # Fallback: use the prompt itself
         topic = prompt[:50]  # First 50 chars
     
     # Detect language (simple check for Arabic characters)
-    has_arabic = bool(re.search(r'[\u0600-\u06FF]', prompt))
+    has_arabic = _has_arabic(prompt)
     language = 'ar' if has_arabic else 'en'
     
     # Generate YouTube links
-    links = generate_youtube_links(topic, language)
+    links = _youtube_link_pairs(topic, language)
     
     if not links:
         return response
@@ -167,16 +228,12 @@ def append_youtube_links(response: str, prompt: str) -> str:
     # Append links to response
     separator = "\n\n" if response.strip() else ""
     
-    if language == 'ar':
-        links_section = f"{separator}**روابط يوتيوب للبحث عن '{topic}':**\n\n"
-        for i, link_info in enumerate(links, 1):
-            links_section += f"{i}. [{link_info['label']}]({link_info['url']})\n"
-        links_section += "\nانقر على الروابط أعلاه للعثور على مقاطع الفيديو التعليمية."
-    else:
-        links_section = f"{separator}**YouTube Links for '{topic}':**\n\n"
-        for i, link_info in enumerate(links, 1):
-            links_section += f"{i}. [{link_info['label']}]({link_info['url']})\n"
-        links_section += "\nClick on the links above to find educational videos."
+    header, footer = _LINKS_SECTION_TEXT[language]
+    parts = [separator, header.format(topic=topic)]
+    for i, (label, url) in enumerate(links, 1):
+        parts.append(f"{i}. [{label}]({url})\n")
+    parts.append(footer)
+    links_section = ''.join(parts)
     
     return response + links_section
 
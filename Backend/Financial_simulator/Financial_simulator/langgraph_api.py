@@ -5,20 +5,35 @@ Provides financial forecasting, simulation, and analysis capabilities
 
 import os
 import sys
+import json
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
-import pandas as pd
+from uuid import uuid4
 import numpy as np
 import asyncio
+from bisect import bisect_right
+import threading
+import time
+from functools import lru_cache
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # FastAPI imports
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 import uvicorn
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -41,6 +56,21 @@ except ImportError as e:
     ADVANCED_FORECASTING = False
     logger.warning(f"Advanced forecasting not available: {e}")
 
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, which also handles NumPy values natively"""
+    media_type = "application/json"
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+DefaultResponse = ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
+
+def _json_dumps(content: Any) -> bytes:
+    """Encode content as compact UTF-8 JSON, the same way DefaultResponse renders it"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
 # Pydantic models
 class FinancialProfile(BaseModel):
     """Financial profile for simulation"""
@@ -76,15 +106,32 @@ class ForecastResponse(BaseModel):
     status: str
     forecast_data: List[Dict[str, Any]]
     model_used: str
-    accuracy_metrics: Dict[str, float]
+    accuracy_metrics: Dict[str, Any]
     summary: Dict[str, Any]
     timestamp: str
 
+# Dedicated pool for CPU-bound simulations, kept apart from the loop's default
+# executor. Created at import so it also exists when this app is mounted as a
+# sub-application (mounted apps don't run their own lifespan).
+simulation_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SIM_WORKERS", os.cpu_count() or 1)),
+    thread_name_prefix="simulation"
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage application lifespan events"""
+    yield
+    simulation_executor.shutdown(wait=False, cancel_futures=True)
+
 # FastAPI app
 app = FastAPI(
     title="Financial Simulator API",
     description="Financial forecasting, simulation, and analysis using LangGraph",
-    version="1.0.0"
+    version="1.0.0",
+    # Simulation payloads carry up to 120 monthly breakdown rows; encode them with orjson
+    default_response_class=DefaultResponse,
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -96,16 +143,123 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Goal keywords and their alignment score, checked in order
+_GOAL_KEYWORDS = (
+    ("emergency", 85),   # Emergency fund is high priority
+    ("investment", 75),  # Investment goals are good
+    ("growth", 75),
+    ("debt", 90),        # Debt reduction is excellent
+    ("pay off", 90),
+    ("save", 70),        # General saving is good
+)
+
+# Karmic levels as (minimum score, level, message), highest first
+_KARMIC_LEVELS = (
+    (90, "Enlightened Investor", "Your financial wisdom shines brightly! You demonstrate exceptional discipline and clarity."),
+    (80, "Wise Planner", "You show great financial wisdom. Continue on this path of mindful money management."),
+    (70, "Conscious Saver", "You're developing good financial habits. Keep building your financial consciousness."),
+    (60, "Awakening Spender", "You're beginning to understand financial balance. Focus on increasing your savings discipline."),
+    (0, "Seeking Balance", "Your financial journey is just beginning. Embrace mindful spending and conscious saving."),
+)
+
+# Recommendations per savings-rate band; _SAVINGS_RATE_BANDS holds the band edges
+_SAVINGS_RATE_BANDS = (10, 20)
+_SAVINGS_RECOMMENDATIONS = (
+    (
+        "Focus on expense reduction to increase savings rate above 10%",
+        "Consider creating a detailed budget to track spending",
+    ),
+    (
+        "Good savings rate! Consider diversifying into low-risk investments",
+        "Build an emergency fund covering 3-6 months of expenses",
+    ),
+    (
+        "Excellent savings rate! You can consider higher-yield investments",
+    ),
+)
+
+# Recommendations per risk level; unknown levels are treated as high risk
+_RISK_RECOMMENDATIONS = {
+    "low": (
+        "Consider government bonds, high-yield savings accounts, and CDs",
+        "Focus on capital preservation with modest growth",
+    ),
+    "medium": (
+        "Balanced portfolio with 60% stocks, 40% bonds",
+        "Consider index funds and diversified ETFs",
+    ),
+    "high": (
+        "Growth-focused portfolio with higher stock allocation",
+        "Consider growth stocks, emerging markets, and alternative investments",
+    ),
+}
+
+# Savings milestones as (name, amount, message), sorted by amount
+_MILESTONES = (
+    ("first_thousand", 1000, "🎉 Congratulations! You've reached your first ₹1,000 milestone!"),
+    ("emergency_fund_start", 5000, "🛡️ Great job! You're building a solid emergency fund foundation!"),
+    ("investment_ready", 10000, "📈 Excellent! You're ready to explore investment opportunities!"),
+    ("substantial_savings", 25000, "💎 Outstanding! You've built substantial savings!"),
+    ("major_milestone", 50000, "🏆 Incredible achievement! You've reached a major financial milestone!"),
+)
+_MILESTONE_AMOUNTS = np.array([amount for _, amount, _ in _MILESTONES], dtype=np.float64)
+
+def _expense_total(expenses: List[Dict[str, Any]]) -> float:
+    """Sum the expense amounts with a single NumPy reduction"""
+    if not expenses:
+        return 0.0
+    amounts = np.fromiter(
+        (float(expense.get('amount', 0)) for expense in expenses),
+        dtype=np.float64,
+        count=len(expenses)
+    )
+    return float(amounts.sum())
+
+def _score_discipline(month_numbers: np.ndarray, contributions: np.ndarray, expected_contribution: float) -> np.ndarray:
+    """Calculate the discipline score of every simulated month in one pass"""
+    if expected_contribution <= 0:
+        return np.full(len(month_numbers), 50.0)
+    
+    ratios = contributions / expected_contribution
+    base_scores = np.select(
+        [ratios >= 1.0, ratios >= 0.8, ratios >= 0.6],
+        [100.0, 85.0, 70.0],
+        default=50.0
+    )
+    
+    # Add consistency bonus for later months
+    consistency_bonus = np.minimum(month_numbers * 0.5, 10)
+    return np.minimum(base_scores + consistency_bonus, 100)
+
 class FinancialSimulator:
     """Main financial simulator class with enhanced agent-based functionality"""
     
     def __init__(self):
-        self.active_simulations = {}
-        self.simulation_results = {}
+        # LRU stores capped at max_simulations entries so memory stays bounded
+        self.active_simulations = OrderedDict()
+        self.simulation_results = OrderedDict()
+        self.max_simulations = int(os.getenv("SIM_RESULTS_CAP", "256"))
+        # Simulations run in worker threads; guards access to the stores above
+        self.lock = threading.Lock()
+    
+    def _put(self, store: OrderedDict, key: str, value: Any) -> None:
+        """Insert into an LRU store, evicting the oldest entries past the cap (hold self.lock)"""
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_simulations:
+            store.popitem(last=False)
+    
+    def get_results(self, simulation_id: str) -> Optional[Dict[str, Any]]:
+        """Get stored results for a simulation, marking it as recently used"""
+        with self.lock:
+            results = self.simulation_results.get(simulation_id)
+            if results is not None:
+                self.simulation_results.move_to_end(simulation_id)
+            return results
         
     def calculate_savings_potential(self, profile: FinancialProfile) -> Dict[str, float]:
         """Calculate savings potential based on profile"""
-        total_expenses = sum(float(expense.get('amount', 0)) for expense in profile.expenses)
+        total_expenses = _expense_total(profile.expenses)
         potential_savings = profile.monthly_income - total_expenses
         
         return {
@@ -118,21 +272,13 @@ class FinancialSimulator:
     def calculate_karmic_score(self, profile: FinancialProfile, savings_info: Dict) -> Dict[str, Any]:
         """Calculate karmic score based on financial behavior and goals"""
         savings_rate = savings_info["savings_rate"]
-        goal_alignment = 0
-        discipline_score = 0
-        wellness_score = 0
         
-        # Goal alignment scoring (0-100)
-        if "emergency" in profile.financial_goal.lower():
-            goal_alignment = 85  # Emergency fund is high priority
-        elif "investment" in profile.financial_goal.lower() or "growth" in profile.financial_goal.lower():
-            goal_alignment = 75  # Investment goals are good
-        elif "debt" in profile.financial_goal.lower() or "pay off" in profile.financial_goal.lower():
-            goal_alignment = 90  # Debt reduction is excellent
-        elif "save" in profile.financial_goal.lower():
-            goal_alignment = 70  # General saving is good
-        else:
-            goal_alignment = 50  # Unclear goals
+        # Goal alignment scoring (0-100): first matching keyword wins
+        goal_lower = profile.financial_goal.lower()
+        goal_alignment = next(
+            (score for keyword, score in _GOAL_KEYWORDS if keyword in goal_lower),
+            50  # Unclear goals
+        )
         
         # Discipline score based on savings rate
         if savings_rate >= 20:
@@ -166,71 +312,61 @@ class FinancialSimulator:
             wellness_score * 0.3     # 30% weight
         )
         
-        # Determine karmic level
-        if karmic_score >= 90:
-            karmic_level = "Enlightened Investor"
-            karmic_message = "Your financial wisdom shines brightly! You demonstrate exceptional discipline and clarity."
-        elif karmic_score >= 80:
-            karmic_level = "Wise Planner"
-            karmic_message = "You show great financial wisdom. Continue on this path of mindful money management."
-        elif karmic_score >= 70:
-            karmic_level = "Conscious Saver"
-            karmic_message = "You're developing good financial habits. Keep building your financial consciousness."
-        elif karmic_score >= 60:
-            karmic_level = "Awakening Spender"
-            karmic_message = "You're beginning to understand financial balance. Focus on increasing your savings discipline."
+        # Determine karmic level: first threshold the score reaches
+        for threshold, karmic_level, karmic_message in _KARMIC_LEVELS:
+            if karmic_score >= threshold:
+                break
+        
+        # Insight categories
+        if savings_rate >= 20:
+            savings_rate_category = "Excellent"
+        elif savings_rate >= 10:
+            savings_rate_category = "Good"
         else:
-            karmic_level = "Seeking Balance"
-            karmic_message = "Your financial journey is just beginning. Embrace mindful spending and conscious saving."
+            savings_rate_category = "Needs Improvement"
         
+        if expense_to_income_ratio < 0.8:
+            stress_level = "Low"
+        elif expense_to_income_ratio < 0.9:
+            stress_level = "Medium"
+        else:
+            stress_level = "High"
+        
+        goal_clarity = "Clear" if goal_alignment >= 70 else "Moderate" if goal_alignment >= 50 else "Unclear"
+        
+        # Component scores are whole numbers, so only the weighted total needs rounding
         return {
             "overall_score": round(karmic_score, 2),
             "level": karmic_level,
             "message": karmic_message,
             "breakdown": {
-                "goal_alignment": round(goal_alignment, 2),
-                "discipline_score": round(discipline_score, 2),
-                "wellness_score": round(wellness_score, 2)
+                "goal_alignment": goal_alignment,
+                "discipline_score": discipline_score,
+                "wellness_score": wellness_score
             },
             "insights": {
-                "savings_rate_category": "Excellent" if savings_rate >= 20 else "Good" if savings_rate >= 10 else "Needs Improvement",
-                "stress_level": "Low" if expense_to_income_ratio < 0.8 else "Medium" if expense_to_income_ratio < 0.9 else "High",
-                "goal_clarity": "Clear" if goal_alignment >= 70 else "Moderate" if goal_alignment >= 50 else "Unclear"
+                "savings_rate_category": savings_rate_category,
+                "stress_level": stress_level,
+                "goal_clarity": goal_clarity
             }
         }
     
-    def generate_investment_recommendations(self, profile: FinancialProfile) -> List[str]:
+    def generate_investment_recommendations(self, profile: FinancialProfile, savings_info: Optional[Dict] = None) -> List[str]:
         """Generate investment recommendations based on profile"""
-        recommendations = []
-        
-        savings_info = self.calculate_savings_potential(profile)
+        if savings_info is None:
+            savings_info = self.calculate_savings_potential(profile)
         savings_rate = savings_info["savings_rate"]
         
-        if savings_rate < 10:
-            recommendations.append("Focus on expense reduction to increase savings rate above 10%")
-            recommendations.append("Consider creating a detailed budget to track spending")
-        elif savings_rate < 20:
-            recommendations.append("Good savings rate! Consider diversifying into low-risk investments")
-            recommendations.append("Build an emergency fund covering 3-6 months of expenses")
-        else:
-            recommendations.append("Excellent savings rate! You can consider higher-yield investments")
-        
-        # Risk-based recommendations
-        if profile.risk_level.lower() == "low":
-            recommendations.append("Consider government bonds, high-yield savings accounts, and CDs")
-            recommendations.append("Focus on capital preservation with modest growth")
-        elif profile.risk_level.lower() == "medium":
-            recommendations.append("Balanced portfolio with 60% stocks, 40% bonds")
-            recommendations.append("Consider index funds and diversified ETFs")
-        else:  # High risk
-            recommendations.append("Growth-focused portfolio with higher stock allocation")
-            recommendations.append("Consider growth stocks, emerging markets, and alternative investments")
+        # Savings-rate band (<10%, <20%, 20%+) followed by risk-based recommendations
+        recommendations = list(_SAVINGS_RECOMMENDATIONS[bisect_right(_SAVINGS_RATE_BANDS, savings_rate)])
+        recommendations.extend(_RISK_RECOMMENDATIONS.get(profile.risk_level.lower(), _RISK_RECOMMENDATIONS["high"]))
         
         return recommendations
     
-    def simulate_financial_future(self, profile: FinancialProfile, months: int) -> Dict[str, Any]:
+    def simulate_financial_future(self, profile: FinancialProfile, months: int, savings_info: Optional[Dict] = None) -> Dict[str, Any]:
         """Simulate financial future over specified months with detailed monthly tracking"""
-        savings_info = self.calculate_savings_potential(profile)
+        if savings_info is None:
+            savings_info = self.calculate_savings_potential(profile)
         monthly_savings = savings_info["potential_savings"]
         
         if monthly_savings <= 0:
@@ -252,37 +388,58 @@ class FinancialSimulator:
         annual_rate = annual_growth_rates.get(profile.risk_level.lower(), 0.05)
         monthly_rate = annual_rate / 12
         
-        # Simulate month by month with detailed tracking
+        # Closed-form annuity balance for every month at once:
+        # balance_m = S * ((1 + r)^m - 1) / r, which equals adding the monthly
+        # contribution and then the growth on the previous balance each month
+        month_numbers = np.arange(1, months + 1)
+        if monthly_rate > 0:
+            balances = monthly_savings * ((1 + monthly_rate) ** month_numbers - 1) / monthly_rate
+            # Drop float noise from the power/division so exact amounts (e.g. the
+            # first month's balance) still compare equal to milestone thresholds
+            balances = np.round(balances, 8)
+        else:
+            balances = monthly_savings * month_numbers.astype(np.float64)
+        contributed = monthly_savings * month_numbers
+        growth_totals = balances - contributed
+        growth_per_month = np.diff(balances, prepend=0.0) - monthly_savings
+        growth_percentages = growth_totals / contributed * 100
+        
+        # Every month contributes the full expected savings amount
+        discipline_scores = _score_discipline(
+            month_numbers,
+            np.full(months, monthly_savings),
+            savings_info["potential_savings"]
+        )
+        
         projected_savings = []
         monthly_breakdown = []
-        current_balance = 0
-        
-        for month in range(1, months + 1):
-            # Calculate month details
-            monthly_contribution = monthly_savings
-            growth_this_month = current_balance * monthly_rate
-            
-            # Add monthly savings
-            current_balance += monthly_contribution
-            # Apply growth
-            current_balance += growth_this_month
-            
-            # Calculate additional metrics for this month
-            total_contributed = monthly_savings * month
-            total_growth = current_balance - total_contributed
-            
+        rounded_contribution = round(monthly_savings, 2)
+        
+        # Number of milestones reached by each month's balance
+        reached_counts = np.searchsorted(_MILESTONE_AMOUNTS, balances, side='right')
+        
+        for month, current_balance, total_contributed, total_growth, growth_this_month, growth_percentage, discipline_score, reached_count in zip(
+            month_numbers.tolist(),
+            balances.tolist(),
+            contributed.tolist(),
+            growth_totals.tolist(),
+            growth_per_month.tolist(),
+            growth_percentages.tolist(),
+            discipline_scores.tolist(),
+            reached_counts.tolist(),
+        ):
             # Monthly breakdown for detailed analysis
-            monthly_data = {
+            monthly_breakdown.append({
                 "month": month,
                 "balance": round(current_balance, 2),
-                "monthly_contribution": round(monthly_contribution, 2),
+                "monthly_contribution": rounded_contribution,
                 "growth_this_month": round(growth_this_month, 2),
                 "total_contributed": round(total_contributed, 2),
                 "total_growth": round(total_growth, 2),
-                "growth_percentage": round((total_growth / total_contributed * 100) if total_contributed > 0 else 0, 2),
-                "discipline_score": self._calculate_monthly_discipline_score(month, monthly_contribution, profile),
-                "milestone_reached": self._check_milestones(current_balance, total_contributed)
-            }
+                "growth_percentage": round(growth_percentage, 2),
+                "discipline_score": discipline_score,
+                "milestone_reached": self._check_milestones(current_balance, total_contributed, reached_count)
+            })
             
             projected_savings.append({
                 "month": month,
@@ -290,8 +447,6 @@ class FinancialSimulator:
                 "total_contributed": round(total_contributed, 2),
                 "growth_amount": round(total_growth, 2)
             })
-            
-            monthly_breakdown.append(monthly_data)
         
         return {
             "status": "success",
@@ -309,153 +464,125 @@ class FinancialSimulator:
             }
         }
     
-    def _calculate_monthly_discipline_score(self, month: int, contribution: float, profile: FinancialProfile) -> float:
-        """Calculate discipline score for a specific month"""
-        expected_contribution = self.calculate_savings_potential(profile)["potential_savings"]
-        if expected_contribution <= 0:
-            return 50
-        
-        ratio = contribution / expected_contribution
-        if ratio >= 1.0:
-            base_score = 100
-        elif ratio >= 0.8:
-            base_score = 85
-        elif ratio >= 0.6:
-            base_score = 70
-        else:
-            base_score = 50
-        
-        # Add consistency bonus for later months
-        consistency_bonus = min(month * 0.5, 10)
-        return min(base_score + consistency_bonus, 100)
-    
-    def _check_milestones(self, current_balance: float, total_contributed: float) -> Dict[str, Any]:
+    def _check_milestones(self, current_balance: float, total_contributed: float, reached_count: Optional[int] = None) -> Dict[str, Any]:
         """Check if any financial milestones have been reached"""
-        milestones = {
-            "first_thousand": 1000,
-            "emergency_fund_start": 5000,
-            "investment_ready": 10000,
-            "substantial_savings": 25000,
-            "major_milestone": 50000
-        }
+        # Milestones are sorted, so the reached ones are a prefix of the table
+        if reached_count is None:
+            reached_count = int(np.searchsorted(_MILESTONE_AMOUNTS, current_balance, side='right'))
         
-        reached_milestones = []
-        for milestone_name, amount in milestones.items():
-            if current_balance >= amount:
-                reached_milestones.append({
-                    "name": milestone_name,
-                    "amount": amount,
-                    "message": self._get_milestone_message(milestone_name)
-                })
+        reached_milestones = [
+            {"name": name, "amount": amount, "message": message}
+            for name, amount, message in _MILESTONES[:reached_count]
+        ]
         
         return {
-            "reached": len(reached_milestones) > 0,
+            "reached": reached_count > 0,
             "milestones": reached_milestones,
-            "next_milestone": self._get_next_milestone(current_balance, milestones)
-        }
-    
-    def _get_milestone_message(self, milestone_name: str) -> str:
-        """Get congratulatory message for reaching a milestone"""
-        messages = {
-            "first_thousand": "🎉 Congratulations! You've reached your first ₹1,000 milestone!",
-            "emergency_fund_start": "🛡️ Great job! You're building a solid emergency fund foundation!",
-            "investment_ready": "📈 Excellent! You're ready to explore investment opportunities!",
-            "substantial_savings": "💎 Outstanding! You've built substantial savings!",
-            "major_milestone": "🏆 Incredible achievement! You've reached a major financial milestone!"
+            "next_milestone": self._get_next_milestone(current_balance, reached_count)
         }
-        return messages.get(milestone_name, "🎯 Milestone achieved!")
     
-    def _get_next_milestone(self, current_balance: float, milestones: Dict) -> Dict[str, Any]:
+    def _get_next_milestone(self, current_balance: float, reached_count: int) -> Dict[str, Any]:
         """Get information about the next milestone to reach"""
-        for milestone_name, amount in sorted(milestones.items(), key=lambda x: x[1]):
-            if current_balance < amount:
-                return {
-                    "name": milestone_name,
-                    "amount": amount,
-                    "remaining": amount - current_balance,
-                    "progress_percentage": round((current_balance / amount) * 100, 2)
-                }
+        if reached_count < len(_MILESTONES):
+            name, amount, _ = _MILESTONES[reached_count]
+        else:
+            name, amount = "financial_freedom", 100000
         return {
-            "name": "financial_freedom",
-            "amount": 100000,
-            "remaining": 100000 - current_balance,
-            "progress_percentage": round((current_balance / 100000) * 100, 2)
+            "name": name,
+            "amount": amount,
+            "remaining": amount - current_balance,
+            "progress_percentage": round((current_balance / amount) * 100, 2)
         }
 
 # Initialize simulator
 simulator = FinancialSimulator()
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {
+@lru_cache(maxsize=1)
+def _health_body(second: int) -> bytes:
+    """Rendered /health payload, refreshed at most once per second"""
+    return DefaultResponse({
         "status": "healthy",
         "service": "Financial Simulator",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.fromtimestamp(second).isoformat(),
         "advanced_forecasting": ADVANCED_FORECASTING
+    }).body
+
+@app.get("/health")
+async def health_check():
+    """Health check endpoint"""
+    return Response(content=_health_body(int(time.time())), media_type="application/json")
+
+def _run_simulation_sync(request: SimulationRequest) -> SimulationResponse:
+    """Run the CPU-bound part of /start-simulation (called in a worker thread)"""
+    # One clock read per request; the uuid suffix keeps ids unique under concurrency
+    now = datetime.now()
+    timestamp = now.isoformat()
+    simulation_id = f"sim_{now.strftime('%Y%m%d_%H%M%S')}_{uuid4().hex[:8]}"
+    
+    # Calculate savings potential
+    savings_info = simulator.calculate_savings_potential(request.profile)
+    
+    # Calculate karmic score
+    karmic_analysis = simulator.calculate_karmic_score(request.profile, savings_info)
+    
+    # Generate recommendations
+    recommendations = simulator.generate_investment_recommendations(request.profile, savings_info)
+    
+    # Run enhanced simulation
+    simulation_results = simulator.simulate_financial_future(request.profile, request.simulation_months, savings_info)
+    
+    # Enhanced results with karmic score and detailed monthly data
+    results = {
+        "simulation_id": simulation_id,
+        "profile_analysis": savings_info,
+        "karmic_analysis": karmic_analysis,
+        "simulation_data": simulation_results,
+        "investment_recommendations": recommendations,
+        "goal_analysis": {
+            "goal": request.profile.financial_goal,
+            "achievability": "achievable" if savings_info["potential_savings"] > 0 else "challenging",
+            "suggested_timeline": f"{request.simulation_months} months",
+            "karmic_alignment": karmic_analysis["breakdown"]["goal_alignment"]
+        },
+        "wellness_insights": {
+            "financial_stress_level": karmic_analysis["insights"]["stress_level"],
+            "discipline_rating": karmic_analysis["insights"]["savings_rate_category"],
+            "goal_clarity": karmic_analysis["insights"]["goal_clarity"],
+            "overall_wellness": karmic_analysis["level"]
+        },
+        "monthly_insights": {
+            "total_months": len(simulation_results.get("monthly_breakdown", [])),
+            "best_performing_month": simulation_results.get("summary_metrics", {}).get("best_performing_month", 0),
+            "average_growth": simulation_results.get("summary_metrics", {}).get("average_monthly_growth", 0),
+            "compound_effect": simulation_results.get("summary_metrics", {}).get("compound_effect", 0)
+        }
     }
+    
+    # Store simulation
+    with simulator.lock:
+        simulator._put(simulator.active_simulations, simulation_id, {
+            # Already validated; keep the model itself rather than a deep-copied dict
+            "profile": request.profile,
+            "created_at": timestamp,
+            "status": "completed"
+        })
+        simulator._put(simulator.simulation_results, simulation_id, results)
+    
+    return SimulationResponse(
+        status="success",
+        simulation_id=simulation_id,
+        results=results,
+        recommendations=recommendations + [f"Your current karmic score is {karmic_analysis['overall_score']}/100 - {karmic_analysis['level']}"],
+        timestamp=timestamp
+    )
 
 @app.post("/start-simulation", response_model=SimulationResponse)
 async def start_financial_simulation(request: SimulationRequest):
     """Start a financial simulation with enhanced karmic score analysis"""
     try:
-        simulation_id = f"sim_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{len(simulator.active_simulations)}"
-        
-        # Calculate savings potential
-        savings_info = simulator.calculate_savings_potential(request.profile)
-        
-        # Calculate karmic score
-        karmic_analysis = simulator.calculate_karmic_score(request.profile, savings_info)
-        
-        # Generate recommendations
-        recommendations = simulator.generate_investment_recommendations(request.profile)
-        
-        # Run enhanced simulation
-        simulation_results = simulator.simulate_financial_future(request.profile, request.simulation_months)
-        
-        # Store simulation
-        simulator.active_simulations[simulation_id] = {
-            "profile": request.profile.dict(),
-            "created_at": datetime.now().isoformat(),
-            "status": "completed"
-        }
-        
-        # Enhanced results with karmic score and detailed monthly data
-        results = {
-            "simulation_id": simulation_id,
-            "profile_analysis": savings_info,
-            "karmic_analysis": karmic_analysis,
-            "simulation_data": simulation_results,
-            "investment_recommendations": recommendations,
-            "goal_analysis": {
-                "goal": request.profile.financial_goal,
-                "achievability": "achievable" if savings_info["potential_savings"] > 0 else "challenging",
-                "suggested_timeline": f"{request.simulation_months} months",
-                "karmic_alignment": karmic_analysis["breakdown"]["goal_alignment"]
-            },
-            "wellness_insights": {
-                "financial_stress_level": karmic_analysis["insights"]["stress_level"],
-                "discipline_rating": karmic_analysis["insights"]["savings_rate_category"],
-                "goal_clarity": karmic_analysis["insights"]["goal_clarity"],
-                "overall_wellness": karmic_analysis["level"]
-            },
-            "monthly_insights": {
-                "total_months": len(simulation_results.get("monthly_breakdown", [])),
-                "best_performing_month": simulation_results.get("summary_metrics", {}).get("best_performing_month", 0),
-                "average_growth": simulation_results.get("summary_metrics", {}).get("average_monthly_growth", 0),
-                "compound_effect": simulation_results.get("summary_metrics", {}).get("compound_effect", 0)
-            }
-        }
-        
-        simulator.simulation_results[simulation_id] = results
-        
-        return SimulationResponse(
-            status="success",
-            simulation_id=simulation_id,
-            results=results,
-            recommendations=recommendations + [f"Your current karmic score is {karmic_analysis['overall_score']}/100 - {karmic_analysis['level']}"],
-            timestamp=datetime.now().isoformat()
-        )
+        # The simulation is CPU-bound; keep it off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(simulation_executor, _run_simulation_sync, request)
         
     except Exception as e:
         logger.error(f"Simulation error: {e}")
@@ -464,26 +591,52 @@ async def start_financial_simulation(request: SimulationRequest):
 @app.get("/simulation/{simulation_id}")
 async def get_simulation_results(simulation_id: str):
     """Get results of a specific simulation"""
-    if simulation_id not in simulator.simulation_results:
+    results = simulator.get_results(simulation_id)
+    if results is None:
         raise HTTPException(status_code=404, detail="Simulation not found")
     
     return {
         "status": "success",
         "simulation_id": simulation_id,
-        "results": simulator.simulation_results[simulation_id],
+        "results": results,
         "timestamp": datetime.now().isoformat()
     }
 
+def _stream_simulation_payload(payload: Dict[str, Any]):
+    """
+    Yield a /simulation-results body as JSON chunks, one monthly breakdown row at a time
+    
+    The payload is rendered once with a marker in place of the breakdown list,
+    then split around the marker so the rows can be encoded individually.
+    """
+    data = payload["data"]
+    simulation_data = data.get("simulation_data") or {}
+    rows = simulation_data.get("monthly_breakdown")
+    if not rows:
+        yield _json_dumps(payload)
+        return
+    
+    marker = f"__monthly_breakdown_{uuid4().hex}__"
+    skeleton = _json_dumps({
+        **payload,
+        "data": {**data, "simulation_data": {**simulation_data, "monthly_breakdown": marker}}
+    })
+    head, tail = skeleton.split(_json_dumps(marker), 1)
+    
+    yield head + b"["
+    for index, row in enumerate(rows):
+        yield (b"," if index else b"") + _json_dumps(row)
+    yield b"]" + tail
+
 @app.get("/simulation-results/{simulation_id}")
 async def get_simulation_results_by_task_id(simulation_id: str):
     """Get results of a specific simulation (alternative endpoint for frontend compatibility)"""
-    if simulation_id not in simulator.simulation_results:
+    results = simulator.get_results(simulation_id)
+    if results is None:
         raise HTTPException(status_code=404, detail="Simulation not found")
     
     # Format response to match expected frontend structure
-    results = simulator.simulation_results[simulation_id]
-    
-    return {
+    payload = {
         "task_id": simulation_id,
         "task_status": "completed",
         "status": "success",
@@ -493,14 +646,17 @@ async def get_simulation_results_by_task_id(simulation_id: str):
         "data": results,
         "timestamp": datetime.now().isoformat()
     }
+    return StreamingResponse(_stream_simulation_payload(payload), media_type="application/json")
 
 @app.get("/simulations")
 async def list_simulations():
     """List all active simulations"""
+    with simulator.lock:
+        simulation_ids = list(simulator.active_simulations.keys())
     return {
         "status": "success",
-        "simulations": list(simulator.active_simulations.keys()),
-        "count": len(simulator.active_simulations),
+        "simulations": simulation_ids,
+        "count": len(simulation_ids),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -508,33 +664,38 @@ async def list_simulations():
 async def create_financial_forecast(market_data: MarketData):
     """Create financial forecast using advanced models"""
     if not ADVANCED_FORECASTING:
-        # Simple fallback forecast
+        # Simple fallback forecast: linear growth from one clock read
+        now = datetime.now()
+        periods = np.arange(1, market_data.forecast_periods + 1)
+        values = (100 + periods * 0.5).tolist()
         return ForecastResponse(
             status="fallback",
             forecast_data=[
                 {
-                    "date": (datetime.now() + timedelta(days=i)).isoformat(),
-                    "predicted_value": 100 + (i * 0.5),  # Simple linear growth
+                    "date": (now + timedelta(days=day)).isoformat(),
+                    "predicted_value": value,
                     "confidence": "low"
                 }
-                for i in range(1, market_data.forecast_periods + 1)
+                for day, value in zip(periods.tolist(), values)
             ],
             model_used="simple_linear",
             accuracy_metrics={"note": "Advanced forecasting not available"},
             summary={"trend": "upward", "confidence": "low"},
-            timestamp=datetime.now().isoformat()
+            timestamp=now.isoformat()
         )
     
     try:
-        # Use advanced forecasting if available
-        df_data = []
-        for point in market_data.data:
-            df_data.append({
-                'ds': pd.to_datetime(point.get('date')),
-                'y': float(point.get('value', 0))
-            })
+        # pandas is only needed here; importing it lazily keeps startup light
+        import pandas as pd
         
-        df = pd.DataFrame(df_data)
+        # Use advanced forecasting if available
+        # Build the frame column-wise so dates are parsed in one vectorized call
+        dates = [point.get('date') for point in market_data.data]
+        values = [float(point.get('value', 0)) for point in market_data.data]
+        df = pd.DataFrame({
+            'ds': pd.to_datetime(dates),
+            'y': np.asarray(values, dtype=np.float64)
+        })
         
         if len(df) < 10:
             raise HTTPException(status_code=400, detail="Need at least 10 data points for forecasting")
@@ -547,14 +708,25 @@ async def create_financial_forecast(market_data: MarketData):
             model = selection_result['model_object']
             forecast_df = model.predict(periods=market_data.forecast_periods)
             
-            forecast_data = []
-            for _, row in forecast_df.iterrows():
-                forecast_data.append({
-                    "date": row['ds'].isoformat(),
-                    "predicted_value": float(row['yhat']),
-                    "lower_bound": float(row.get('yhat_lower', row['yhat'] * 0.95)),
-                    "upper_bound": float(row.get('yhat_upper', row['yhat'] * 1.05))
-                })
+            # Default bounds to +/-5% of the prediction when the model gives none
+            yhat = forecast_df['yhat']
+            lower = forecast_df['yhat_lower'].fillna(yhat * 0.95) if 'yhat_lower' in forecast_df else yhat * 0.95
+            upper = forecast_df['yhat_upper'].fillna(yhat * 1.05) if 'yhat_upper' in forecast_df else yhat * 1.05
+            
+            forecast_data = [
+                {
+                    "date": date.isoformat(),
+                    "predicted_value": predicted,
+                    "lower_bound": lower_bound,
+                    "upper_bound": upper_bound
+                }
+                for date, predicted, lower_bound, upper_bound in zip(
+                    forecast_df['ds'],
+                    yhat.astype(np.float64).tolist(),
+                    lower.astype(np.float64).tolist(),
+                    upper.astype(np.float64).tolist()
+                )
+            ]
             
             return ForecastResponse(
                 status="success",
@@ -574,29 +746,45 @@ async def create_financial_forecast(market_data: MarketData):
         logger.error(f"Forecasting error: {e}")
         raise HTTPException(status_code=500, detail=f"Forecasting failed: {str(e)}")
 
+# The root payload never changes, so it is rendered once
+_ROOT_BODY = DefaultResponse({
+    "service": "Financial Simulator API",
+    "version": "1.0.0",
+    "status": "running",
+    "endpoints": [
+        "/health",
+        "/start-simulation",
+        "/simulation/{simulation_id}",
+        "/simulations",
+        "/forecast"
+    ],
+    "advanced_forecasting": ADVANCED_FORECASTING
+}).body
+
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {
-        "service": "Financial Simulator API",
-        "version": "1.0.0",
-        "status": "running",
-        "endpoints": [
-            "/health",
-            "/start-simulation",
-            "/simulation/{simulation_id}",
-            "/simulations",
-            "/forecast"
-        ],
-        "advanced_forecasting": ADVANCED_FORECASTING
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8002))
-    uvicorn.run(
-        "langgraph_api:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    if os.getenv("ENVIRONMENT", "development") == "production":
+        # Production: uvloop + httptools, no reloader. Simulation results live in
+        # process memory, so extra workers (WEB_CONCURRENCY) need sticky routing.
+        uvicorn.run(
+            "langgraph_api:app",
+            host="0.0.0.0",
+            port=port,
+            workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+            loop="uvloop",
+            http="httptools",
+            log_level="info"
+        )
+    else:
+        uvicorn.run(
+            "langgraph_api:app",
+            host="0.0.0.0",
+            port=port,
+            reload=True,
+            log_level="info"
+        )
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""
+Dependency providers for Agent Mind-Auth-Memory Link
+Process-wide MongoDB client and chat handler, injected with FastAPI Depends
+"""
+
+from functools import lru_cache
+
+from memory.mongodb_client import MongoDBClient
+from api.chat_handler import ChatHandler
+
+@lru_cache(maxsize=1)
+def get_mongo() -> MongoDBClient:
+    """Shared MongoDB client (override with app.dependency_overrides in tests)"""
+    return MongoDBClient()
+
+@lru_cache(maxsize=1)
+def get_chat() -> ChatHandler:
+    """Shared chat handler (override with app.dependency_overrides in tests)"""
+    return ChatHandler()
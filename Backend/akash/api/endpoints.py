@@ -10,6 +10,7 @@ from typing import Dict, Any
 from auth.supabase_auth import get_current_user
 from memory.mongodb_client import MongoDBClient
 from api.chat_handler import ChatHandler
+from api.dependencies import get_mongo, get_chat
 from models.schemas import (
     ChatRequest, ChatResponse, SaveProgressRequest, SaveProgressResponse,
     UserInfo, ErrorResponse
@@ -18,20 +19,12 @@ from models.schemas import (
 # Create router
 router = APIRouter()
 
-# Initialize components (these will be injected in main.py)
-mongodb_client = None
-chat_handler = None
-
-def set_dependencies(mongo_client: MongoDBClient, chat_handler_instance: ChatHandler):
-    """Set the dependencies for the endpoints"""
-    global mongodb_client, chat_handler
-    mongodb_client = mongo_client
-    chat_handler = chat_handler_instance
-
 @router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(
     request: ChatRequest,
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    mongodb_client: MongoDBClient = Depends(get_mongo),
+    chat_handler: ChatHandler = Depends(get_chat)
 ):
     """
     Protected chat endpoint that integrates with Vedant's agent API
@@ -115,7 +108,8 @@ async def chat_endpoint(
 @router.post("/save_progress", response_model=SaveProgressResponse)
 async def save_progress_endpoint(
     request: SaveProgressRequest,
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    mongodb_client: MongoDBClient = Depends(get_mongo)
 ):
     """
     Protected endpoint to save user's current chat session
@@ -154,7 +148,8 @@ async def save_progress_endpoint(
 async def get_chat_history(
     limit: int = 50,
     skip: int = 0,
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    mongodb_client: MongoDBClient = Depends(get_mongo)
 ):
     """
     Get user's chat history
@@ -187,7 +182,8 @@ async def get_chat_history(
 
 @router.get("/user_session")
 async def get_user_session(
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    mongodb_client: MongoDBClient = Depends(get_mongo)
 ):
     """
     Get user's current session
@@ -220,7 +216,8 @@ async def get_user_session(
 
 @router.delete("/user_data")
 async def delete_user_data(
-    current_user: Dict[str, Any] = Depends(get_current_user)
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    mongodb_client: MongoDBClient = Depends(get_mongo)
 ):
     """
     Delete all user data (GDPR compliance)
@@ -19,32 +19,28 @@ load_shared_config("akash")
 
 from auth.supabase_auth import verify_token, get_current_user
 from memory.mongodb_client import MongoDBClient
-from api.chat_handler import ChatHandler
-from api.endpoints import router as api_router, set_dependencies
+from api.dependencies import get_mongo, get_chat
+from api.endpoints import router as api_router
 from models.schemas import ChatRequest, ChatResponse, SaveProgressRequest
 
-# Initialize components
-mongodb_client = MongoDBClient()
-chat_handler = ChatHandler()
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifespan events"""
     # Startup
     try:
-        await mongodb_client.connect()
+        await get_mongo().connect()
         print("✅ MongoDB connected successfully")
     except Exception as e:
         print(f"⚠️  MongoDB connection failed: {e}")
         print("   Application will continue without MongoDB (limited functionality)")
 
-    # Set dependencies for API endpoints
-    set_dependencies(mongodb_client, chat_handler)
+    # Create the chat handler up front so the first request doesn't pay for it
+    get_chat()
     yield
 
     # Shutdown
     try:
-        await mongodb_client.close()
+        await get_mongo().close()
     except Exception as e:
         print(f"Warning: Error closing MongoDB connection: {e}")
 
@@ -91,7 +87,7 @@ async def root():
     return {"message": "Agent Mind-Auth-Memory Link is running"}
 
 @app.get("/health")
-async def health_check():
+async def health_check(mongodb_client: MongoDBClient = Depends(get_mongo)):
     """Detailed health check"""
     return {
         "status": "healthy",
@@ -99,8 +95,28 @@ async def health_check():
         "components": ["auth", "memory", "chat"]
     }
 
+@app.get("/health/deep")
+async def deep_health_check(mongodb_client: MongoDBClient = Depends(get_mongo)):
+    """Health check that always pings MongoDB (bypasses the cached status)"""
+    return {
+        "status": "healthy",
+        "mongodb": await mongodb_client.deep_health_check(),
+        "components": ["auth", "memory", "chat"]
+    }
+
 if __name__ == "__main__":
     import uvicorn
     # Use port from environment variable or default to 8008 to avoid conflicts
     port = int(os.getenv("AKASH_SERVICE_PORT", 8008))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    if os.getenv("ENVIRONMENT", "development") == "production":
+        # Production: one worker per CPU on uvloop + httptools
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=port,
+            workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+            loop="uvloop",
+            http="httptools",
+        )
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
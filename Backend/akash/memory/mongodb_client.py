@@ -4,7 +4,8 @@ Handles user chat history and session storage
 """
 
 import os
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, PyMongoError
@@ -20,6 +21,9 @@ class MongoDBClient:
         self.db = None
         self.chat_history_collection = None
         self.user_sessions_collection = None
+        # (monotonic time, result) of the last health check
+        self._health_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        self.health_cache_ttl = 2.0
     
     async def connect(self):
         """Initialize MongoDB connection"""
@@ -55,7 +59,21 @@ class MongoDBClient:
             logger.info("MongoDB connection closed")
     
     async def health_check(self) -> Dict[str, Any]:
-        """Check MongoDB connection health"""
+        """
+        Check MongoDB connection health, reusing the last result for a short TTL
+
+        Frequent liveness probes then cost at most one ping per TTL window.
+        """
+        now = time.monotonic()
+        if self._health_cache and now - self._health_cache[0] < self.health_cache_ttl:
+            return self._health_cache[1]
+
+        result = await self.deep_health_check()
+        self._health_cache = (now, result)
+        return result
+
+    async def deep_health_check(self) -> Dict[str, Any]:
+        """Check MongoDB connection health with a fresh ping"""
         try:
             if not self.client:
                 return {"status": "disconnected", "error": "No client connection"}
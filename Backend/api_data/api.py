@@ -4,31 +4,53 @@ import sys, os
 # Ensure Backend is on path for utils
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from utils.logging_config import configure_logging
-logger = configure_logging("api_data")
+logger = configure_logging("api_data", use_queue=True)
 from dotenv import load_dotenv
 import uvicorn
-import requests
+import hashlib
+import io
+import json
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+import httpx
+import re
 import os
 import asyncio
-from api_data.llm_service import llm_service
 from datetime import datetime
 from api_data.subject_data import subjects_data
 from api_data.lectures_data import lectures_data
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-# Import Arabic translation utility
-try:
-    from arabic_translator import translate_to_arabic, translate_to_arabic_with_checkpoint
-    ARABIC_TRANSLATOR_AVAILABLE = True
-    logger.info("✅ Arabic translator module loaded successfully")
-except ImportError as e:
-    ARABIC_TRANSLATOR_AVAILABLE = False
-    translate_to_arabic_with_checkpoint = None
-    logger.warning(f"⚠️ Arabic translator module not available: {e}")
-except Exception as e:
-    ARABIC_TRANSLATOR_AVAILABLE = False
-    translate_to_arabic_with_checkpoint = None
-    logger.warning(f"⚠️ Error loading Arabic translator: {e}")
+# Heavy optional modules are imported on first use so workers that never
+# translate, parse DOCX or hit the llm_service fallback don't pay for them.
+@lru_cache(maxsize=1)
+def _arabic_translator():
+    """Return the arabic_translator module, or None if it cannot be loaded."""
+    try:
+        import arabic_translator
+        logger.info("✅ Arabic translator module loaded successfully")
+        return arabic_translator
+    except ImportError as e:
+        logger.warning(f"⚠️ Arabic translator module not available: {e}")
+    except Exception as e:
+        logger.warning(f"⚠️ Error loading Arabic translator: {e}")
+    return None
+
+
+@lru_cache(maxsize=1)
+def _docx():
+    """Return (Document, docx2txt); raises ImportError if python-docx is missing."""
+    from docx import Document
+    import docx2txt
+    return Document, docx2txt
+
+
+@lru_cache(maxsize=1)
+def _llm_service():
+    from api_data.llm_service import llm_service
+    return llm_service
 # Test data for fallback when database is empty
 test_data = [
     {
@@ -45,21 +67,62 @@ test_data = [
     }
 ]
 from api_data.db import pdf_collection , image_collection, user_collection
+from api_data.semantic_cache import SemanticCache
 from datetime import datetime, timezone
 import shutil
 import time
-
-# In-memory storage for agent data (in production, use a proper database)
-agent_outputs = []
-agent_logs = []
+from collections import deque
+from itertools import count, islice, takewhile
+from operator import itemgetter
+import heapq
+
+# In-memory storage for agent data (in production, use a proper database).
+# Kept per user as (sequence, record) pairs, each user's history bounded, so a
+# reset drops one user's entries without scanning everyone else's.
+AGENT_OUTPUTS_PER_USER = 500
+AGENT_LOGS_PER_USER = 2_000
+AGENT_SIMULATION_TTL = 3600.0  # seconds without activity before a simulation is dropped
+agent_outputs = defaultdict(lambda: deque(maxlen=AGENT_OUTPUTS_PER_USER))
+agent_logs = defaultdict(lambda: deque(maxlen=AGENT_LOGS_PER_USER))
+_agent_record_seq = count(1)  # also the polling cursor of /get_agent_output and /agent_logs
 agent_simulations = {}  # Track active simulations by user_id
 try:
-    from docx import Document
-    import docx2txt
-    DOCX_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    DOCX_AVAILABLE = False
-    print("⚠️ python-docx not available. DOC/DOCX support will be limited.")
+    ORJSON_AVAILABLE = False
+# Both raise a ValueError subclass (orjson.JSONDecodeError / json.JSONDecodeError)
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+try:
+    import aiofiles
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Shared async HTTP client for LLM calls: one keep-alive pool per worker instead
+# of a blocking requests.post (and a fresh TLS handshake) per chat message.
+# Connection pools are per origin, so Groq and the UniGuru tunnel never share one.
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=128)
+_HTTP = httpx.AsyncClient(
+    http2=HTTP2_AVAILABLE,
+    timeout=60.0,
+    limits=_HTTP_LIMITS,
+    # retry failed connection attempts (not responses) before giving up
+    transport=httpx.AsyncHTTPTransport(http2=HTTP2_AVAILABLE, limits=_HTTP_LIMITS, retries=2),
+)
+
+# Dedicated pool for document parsing and EasyOCR: keeps them off the event
+# loop and caps how many model-heavy jobs run at once per worker
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "4"))
+_ocr_pool = ThreadPoolExecutor(max_workers=OCR_WORKERS, thread_name_prefix="ocr")
+
+async def _run_in_ocr_pool(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(_ocr_pool, func, *args)
 
 # Load environment variables from centralized configuration
 import sys
@@ -69,19 +132,28 @@ from shared_config import load_shared_config
 # Load centralized configuration
 load_shared_config("api_data")
 
+# Semantic cache in front of call_llm (persisted to user_collection as type "llm_cache")
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+llm_cache = SemanticCache(
+    collection=user_collection,
+    threshold=float(os.getenv("LLM_CACHE_THRESHOLD", "0.92")),
+)
+
 # Create temporary directory for file processing
 TEMP_DIR = os.path.join(os.path.dirname(__file__), "temp")
 os.makedirs(TEMP_DIR, exist_ok=True)
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, Query
-from pydantic import BaseModel, Field
-from typing import List, Optional, Union
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
+from typing import Any, AsyncIterator, Callable, List, Literal, NamedTuple, Optional, Tuple, Union
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse, FileResponse
+from fastapi import Request
+from fastapi.responses import StreamingResponse, JSONResponse, FileResponse, ORJSONResponse, Response
 from uuid import uuid4
+from bson import ObjectId
 
-# Initialize FastAPI app
-app = FastAPI()
+# Initialize FastAPI app (orjson encodes responses when installed)
+app = FastAPI(default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse)
 
 # Import centralized CORS configuration
 from common.cors import configure_cors
@@ -89,6 +161,38 @@ from common.cors import configure_cors
 # Configure CORS using centralized helper
 configure_cors(app)
 
+@app.on_event("startup")
+async def _check_llm_config():
+    # Surface a missing/invalid GROQ_API_KEY at startup instead of on the first chat
+    try:
+        _groq_headers()
+    except Exception as e:
+        logger.error(f"Groq LLM calls will fail: {e}")
+
+@app.on_event("startup")
+async def _warm_llm_cache():
+    if LLM_CACHE_ENABLED:
+        await asyncio.to_thread(llm_cache.load)
+
+# Load the Arabic checkpoint model in the background at startup so the first
+# Arabic request doesn't pay for it
+ARABIC_MODEL_WARMUP = os.getenv("ARABIC_MODEL_WARMUP", "true").lower() == "true"
+
+async def _load_arabic_translator():
+    translator = await asyncio.to_thread(_arabic_translator)
+    if translator is not None:
+        await asyncio.to_thread(translator.warm_up_checkpoint_model)
+
+@app.on_event("startup")
+async def _warm_arabic_translator():
+    if ARABIC_MODEL_WARMUP:
+        app.state.arabic_warmup = asyncio.create_task(_load_arabic_translator())
+
+@app.on_event("shutdown")
+async def _close_http_client():
+    await _HTTP.aclose()
+    _ocr_pool.shutdown(wait=False, cancel_futures=True)
+
 # Global exception handler for consistent errors
 @app.exception_handler(Exception)
 async def _on_error(request, exc):
@@ -99,7 +203,6 @@ async def _on_error(request, exc):
 # Generic OPTIONS handler for all paths
 @app.options("/{path:path}")
 async def options_handler(path: str):
-    from fastapi.responses import Response
     return Response(status_code=200)
 
 # Add a health check endpoint
@@ -109,36 +212,71 @@ def health_check():
 
 # ==== Subject API Models and Routes ====
 class Subject(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True, extra="ignore")
+
     id: int
     name: str
     code: str
 
+# The static datasets don't follow the Subject/Lecture/Test schemas, so they
+# are serialized as plain JSON rather than through model-typed adapters
+_JSON_ADAPTER = TypeAdapter(Any)
+
+def _json_bytes(content) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content)
+    return _JSON_ADAPTER.dump_json(content)
+
+def _static_json(content) -> tuple:
+    """Serialize static data once; returns (body, quoted ETag)"""
+    body = _json_bytes(content)
+    return body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def _static_json_response(request: Request, body: bytes, etag: str) -> Response:
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+def _json_response(content) -> Response:
+    """Encode a plain JSON payload directly, skipping FastAPI's jsonable_encoder pass"""
+    return Response(content=_json_bytes(content), media_type="application/json")
+
+_SUBJECTS_BODY, _SUBJECTS_ETAG = _static_json(subjects_data)
+
 @app.get("/subjects_dummy")
-def get_subjects():
-    return JSONResponse(content=subjects_data)
+def get_subjects(request: Request):
+    return _static_json_response(request, _SUBJECTS_BODY, _SUBJECTS_ETAG)
 
 
 # ==== Lectures API Models and Routes ====
 class Lecture(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True, extra="ignore")
+
     id: int
     topic: str
     subject_id: int
 
+_LECTURES_BODY, _LECTURES_ETAG = _static_json(lectures_data)
+
 @app.get("/lecture_dummy")
-def get_lectures():
-    return JSONResponse(content=lectures_data)
+def get_lectures(request: Request):
+    return _static_json_response(request, _LECTURES_BODY, _LECTURES_ETAG)
 
 # ==== Test API Models and Routes ====
 class Test(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True, extra="ignore")
+
     id: int
     name: str
     subject_id: int
     date: Optional[str] = None
 
 
+_TESTS_BODY, _TESTS_ETAG = _static_json(test_data)
+
 @app.get("/test_dummy")
-def get_test():
-    return JSONResponse(content=test_data)
+def get_test(request: Request):
+    return _static_json_response(request, _TESTS_BODY, _TESTS_ETAG)
 
 #Chatbot
 groq_api_key = os.environ.get('GROQ_API_KEY')
@@ -149,31 +287,134 @@ llm_responses: List[dict] = []
 
 # Pydantic model for request validation
 class ChatMessage(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True, extra="ignore")
+
     message: str
     llm: str = "grok"  # Default to grok, accepts: grok, llama, chatgpt, uniguru
     language: str = "english"  # Default to english, accepts: english, arabic
     timestamp: str = None
     type: str = "chat_message"
 
+    @field_validator("language", "llm", mode="before")
+    @classmethod
+    def normalize(cls, v):
+        return v.strip().lower() if isinstance(v, str) else v
+
+
+# Chat queries are written to Mongo in batches by a background task instead of
+# one blocking insert_one per /chatpost
+QUERY_BATCH_SIZE = 100
+QUERY_BATCH_WINDOW = 0.05  # seconds to wait for more queries before writing
+_query_queue: asyncio.Queue = asyncio.Queue()
+# Set once a query's insert has been attempted, so its response update can't
+# land before the document exists
+_query_written = {}
+
+# Queries accepted by this worker and not answered yet, newest last. /chatbot
+# takes the newest from here and only queries MongoDB when this is empty
+# (queries accepted by another worker, or before a restart).
+UNANSWERED_QUERIES_MAX = 1000
+_unanswered_queries: "OrderedDict[ObjectId, dict]" = OrderedDict()
+
+async def _collect_batch(queue: asyncio.Queue, max_size: int, window: float) -> list:
+    """Wait for one item, then take whatever else arrives within window (up to max_size)"""
+    loop = asyncio.get_running_loop()
+    batch = [await queue.get()]
+    deadline = loop.time() + window
+    while len(batch) < max_size:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+async def _drain_query_queue():
+    while True:
+        batch = await _collect_batch(_query_queue, QUERY_BATCH_SIZE, QUERY_BATCH_WINDOW)
+        try:
+            await asyncio.to_thread(user_collection.insert_many, batch, ordered=False)
+        except Exception as e:
+            logger.error("[Backend] Error storing %d chat messages: %s", len(batch), e)
+        finally:
+            for doc in batch:
+                written = _query_written.pop(doc["_id"], None)
+                if written is not None and not written.done():
+                    written.set_result(None)
+                _query_queue.task_done()
+
+@app.on_event("startup")
+async def _start_query_writer():
+    app.state.query_writer = asyncio.create_task(_drain_query_queue())
+
+# Writes the response doesn't depend on are fired off in the background; the
+# set keeps the tasks referenced until they finish
+_background_writes = set()
+# Chat queries whose response write is still in flight, so /chatbot doesn't
+# pick them up again as unanswered
+_pending_answer_ids = set()
+
+def _on_background_write_done(task: asyncio.Task):
+    _background_writes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("[Backend] Background MongoDB write failed: %s", task.exception())
+
+def _spawn_background_write(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    _background_writes.add(task)
+    task.add_done_callback(_on_background_write_done)
+    return task
+
+def _write_in_background(operation: Callable, *args, **kwargs) -> asyncio.Task:
+    return _spawn_background_write(asyncio.to_thread(operation, *args, **kwargs))
+
+async def _update_chat_response(query_id: ObjectId, response_data: dict) -> None:
+    written = _query_written.get(query_id)
+    if written is not None:
+        await written
+    await asyncio.to_thread(
+        user_collection.update_one, {"_id": query_id}, {"$set": {"response": response_data}}
+    )
+
+def _store_chat_response(query_id: ObjectId, response_data: dict) -> None:
+    _pending_answer_ids.add(query_id)
+    task = _spawn_background_write(_update_chat_response(query_id, response_data))
+    task.add_done_callback(lambda _: _pending_answer_ids.discard(query_id))
+
+async def _next_unanswered_query() -> Optional[dict]:
+    """Newest unanswered chat query, from memory when possible"""
+    if _unanswered_queries:
+        return _unanswered_queries.popitem()[1]
+    # Make sure queries accepted by /chatpost have been written
+    await _query_queue.join()
+    unanswered = {"type": "chat_message", "response": None}
+    if _pending_answer_ids:
+        unanswered["_id"] = {"$nin": list(_pending_answer_ids)}
+    return await asyncio.to_thread(
+        user_collection.find_one, unanswered, sort=[("timestamp", -1)]
+    )
+
+@app.on_event("shutdown")
+async def _flush_background_writes():
+    if _background_writes:
+        await asyncio.gather(*_background_writes, return_exceptions=True)
 
 # Route 1: Receive query from frontend
 @app.post("/chatpost")
 async def receive_query(chat: ChatMessage):
     timestamp = datetime.now(timezone.utc).isoformat().replace('+00:00','Z')
     
-    # Extract language and llm from the request
-    language = chat.language if hasattr(chat, 'language') and chat.language else 'english'
-    llm_model = chat.llm if hasattr(chat, 'llm') and chat.llm else 'grok'
-    
-    # Normalize language
-    if not language:
-        language = "english"
-    language = str(language).lower().strip()
-    
-    print(f"🌐 [Backend] Received message in {language}: {chat.message[:100]}...")
-    print(f"🤖 [Backend] Using model: {llm_model}")
+    # language/llm are already stripped and lowercased by ChatMessage
+    language = chat.language or "english"
+    llm_model = chat.llm or "grok"
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("[Backend] Received message in %s for %s: %s...", language, llm_model, chat.message[:100])
     
     query_record = {
+        "_id": ObjectId(),  # generated client-side so the caller gets an ID before the batched write
         "message": chat.message,
         "timestamp": timestamp,
         "type": "chat_message",
@@ -181,412 +422,403 @@ async def receive_query(chat: ChatMessage):
         "llm": llm_model,  # Store model (use 'llm' to match retrieval)
         "response": None  # Initialize response as None
     }
-    try:
-        chat_collection = user_collection.insert_one(query_record)
-        query_record["_id"] = str(chat_collection.inserted_id)
-        print(f"✅ [Backend] Message stored successfully")
-        return {"status": "success", "message": "Query received", "data": query_record}
-    except Exception as e:
-        print(f"❌ [Backend] Error storing message: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to store query:{str(e)}")
+    _query_written[query_record["_id"]] = asyncio.get_running_loop().create_future()
+    _unanswered_queries[query_record["_id"]] = query_record
+    if len(_unanswered_queries) > UNANSWERED_QUERIES_MAX:
+        _unanswered_queries.popitem(last=False)
+    await _query_queue.put(query_record)
+    return {"status": "success", "message": "Query received", "data": {**query_record, "_id": str(query_record["_id"])}}
+
+
+# Numbered / "Chapter" / "Section" prefixes or a trailing colon, in one C-level match
+_HEADING_RE = re.compile(r"(?:[1-5]\.|Chapter|Section|.*:\Z)")
 
+def _structure_document_lines(lines) -> dict:
+    """
+    Single pass over raw document lines: strips them, collects the body,
+    picks the title (first non-empty line) and splits sections on lines that
+    look like headings.
+    """
+    body_lines = []
+    sections = []
+    heading, section_lines = "Content", []
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        body_lines.append(line)
+
+        # Simple heuristic for section headings (short lines, possibly numbered)
+        if len(line) < 100 and (line.isupper() or _HEADING_RE.match(line)):
+            # Save previous section if it has content
+            if section_lines:
+                sections.append({"heading": heading, "content": "\n".join(section_lines) + "\n"})
+            # Start new section
+            heading, section_lines = line, []
+        else:
+            section_lines.append(line)
 
-import requests
+    # Add the last section
+    if section_lines:
+        sections.append({"heading": heading, "content": "\n".join(section_lines) + "\n"})
 
-def parse_word_document(file_path: str) -> dict:
+    return {
+        "title": body_lines[0] if body_lines else "",
+        "body": "\n".join(body_lines),
+        "sections": sections
+    }
+
+def _parse_word_document_sync(file_path: str) -> dict:
     """Parse Word document (DOC/DOCX) and extract text content"""
     try:
-        if not DOCX_AVAILABLE:
+        try:
+            Document, docx2txt = _docx()
+        except ImportError:
+            print("⚠️ python-docx not available. DOC/DOCX support will be limited.")
             raise Exception("python-docx library not available")
 
         # Extract text from DOCX file
         if file_path.lower().endswith('.docx'):
-            # Method 1: Using python-docx for structured parsing
+            # Method 1: Using python-docx, structuring paragraphs as they are read
             try:
-                doc = Document(file_path)
-                paragraphs = []
-                for paragraph in doc.paragraphs:
-                    if paragraph.text.strip():
-                        paragraphs.append(paragraph.text.strip())
-
-                raw_text = '\n'.join(paragraphs)
-
-                # If no content found, try docx2txt as fallback
-                if not raw_text.strip():
-                    raw_text = docx2txt.process(file_path)
-
+                structured = _structure_document_lines(
+                    paragraph.text for paragraph in Document(file_path).paragraphs
+                )
             except Exception:
-                # Fallback to docx2txt
+                structured = None
+
+            # If no content found, try docx2txt as fallback
+            if structured is None or not structured["body"]:
                 raw_text = docx2txt.process(file_path)
+                if not raw_text.strip():
+                    return {"title": "", "body": "", "sections": []}
+                structured = _structure_document_lines(raw_text.strip().split('\n'))
+                structured["body"] = raw_text
         else:
             # For .doc files, we'll need a different approach
             # For now, return an error message
             raise Exception("DOC files are not fully supported. Please convert to DOCX format.")
 
-        if not raw_text.strip():
-            return {"title": "", "body": "", "sections": []}
-
-        # Extract title (first non-empty line)
-        lines = raw_text.strip().split('\n')
-        title = next((line.strip() for line in lines if line.strip()), "")
-
-        # Simple section detection (lines that look like headings)
-        sections = []
-        current_section = {"heading": "Content", "content": ""}
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            # Simple heuristic for section headings (short lines, possibly numbered)
-            if (len(line) < 100 and
-                (line.isupper() or
-                 any(line.startswith(prefix) for prefix in ['1.', '2.', '3.', '4.', '5.', 'Chapter', 'Section']) or
-                 line.endswith(':'))):
-                # Save previous section if it has content
-                if current_section["content"].strip():
-                    sections.append(current_section)
-                # Start new section
-                current_section = {"heading": line, "content": ""}
-            else:
-                current_section["content"] += line + "\n"
-
-        # Add the last section
-        if current_section["content"].strip():
-            sections.append(current_section)
-
         # If no sections were detected, put everything in one section
-        if not sections:
-            sections = [{"heading": "Document Content", "content": raw_text}]
+        if not structured["sections"]:
+            structured["sections"] = [{"heading": "Document Content", "content": structured["body"]}]
 
-        return {
-            "title": title,
-            "body": raw_text,
-            "sections": sections
-        }
+        return structured
 
     except Exception as e:
         print(f"Error parsing Word document: {e}")
         return {"title": "", "body": f"Error parsing document: {str(e)}", "sections": []}
 
-def call_llm(prompt: str, llm: str, language: str = "english") -> str:
-    """
-    Call the specified LLM API with the given prompt.
-    """
-    groq_api_key = os.environ.get('GROQ_API_KEY', '').strip()
-    openai_api_key = os.environ.get('OPENAI_API_KEY', '').strip()
-    
-    # Debug logging
-    print(f"🔍 [call_llm] LLM: {llm}, GROQ_API_KEY present: {bool(groq_api_key)}, Length: {len(groq_api_key) if groq_api_key else 0}")
-    logger.info(f"Calling LLM: {llm}, API key present: {bool(groq_api_key)}")
+async def parse_word_document(file_path: str) -> dict:
+    """Parse a Word document in a worker thread so the event loop stays free"""
+    return await _run_in_ocr_pool(_parse_word_document_sync, file_path)
+
+@lru_cache(maxsize=1)
+def _groq_headers() -> dict:
+    """Sanitize GROQ_API_KEY once and build the shared Groq request headers"""
+    # Remove any quotes or whitespace from API key
+    groq_api_key = os.environ.get('GROQ_API_KEY', '').strip().strip('"').strip("'")
+    if not groq_api_key:
+        raise Exception("GROQ_API_KEY environment variable is not set or is empty")
+    if len(groq_api_key) < 10:
+        raise Exception(f"GROQ_API_KEY appears to be invalid (length: {len(groq_api_key)})")
+    return {
+        "Authorization": f"Bearer {groq_api_key}",
+        "Content-Type": "application/json"
+    }
 
-    try:
-        if llm == "grok":
-            # Use Groq API with reliable LLaMA models
-            if not groq_api_key:
-                raise Exception("GROQ_API_KEY environment variable is not set or is empty")
-            
-            # Remove any quotes or whitespace from API key
-            groq_api_key = groq_api_key.strip().strip('"').strip("'")
-            
-            if not groq_api_key or len(groq_api_key) < 10:
-                raise Exception(f"GROQ_API_KEY appears to be invalid (length: {len(groq_api_key)})")
-            
-            headers = {
-                "Authorization": f"Bearer {groq_api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            # Try multiple models with automatic fallback
-            models_to_try = ["llama-3.1-70b-versatile", "llama-3.1-8b-instant"]
-            last_error = None
-            
-            for model_name in models_to_try:
-                try:
-                    # Create system message with language requirement if Arabic
-                    system_message = "You are a helpful AI assistant that provides detailed, comprehensive summaries and analysis."
-                    if language and str(language).lower() == "arabic":
-                        system_message = """أنت مساعد ذكي مفيد. يجب أن ترد دائماً بالكامل باللغة العربية فقط.
+UNIGURU_URL = (
+    os.getenv("UNIGURU_NGROK_ENDPOINT", "https://3a46c48e4d91.ngrok-free.app").rstrip("/")
+    + "/v1/chat/completions"
+)
+UNIGURU_HEADERS = {"Content-Type": "application/json", "ngrok-skip-browser-warning": "true"}
+
+# Static system prompts per (llm, language). Kept byte-identical across calls
+# (dynamic content only ever goes in the user turn) so provider-side prompt
+# caching can reuse the prefix.
+_ARABIC_REQUIREMENT = " CRITICAL: You MUST respond ENTIRELY in Arabic (العربية). All your responses must be in Arabic using proper Arabic script and formatting. Never respond in English when Arabic is requested."
+_HELPFUL_SYSTEM_PROMPT = "You are a helpful AI assistant that provides detailed, comprehensive summaries and analysis."
+_LLAMA_SYSTEM_PROMPT = "You are LLaMA, a helpful, harmless, and honest AI assistant. You provide detailed, thoughtful responses with a focus on being educational and comprehensive."
+_CHATGPT_SYSTEM_PROMPT = "You are ChatGPT, a helpful AI assistant created by OpenAI. You provide clear, accurate, and helpful responses."
+SYSTEM_PROMPTS = {
+    ("grok", "english"): _HELPFUL_SYSTEM_PROMPT,
+    ("grok", "arabic"): """أنت مساعد ذكي مفيد. يجب أن ترد دائماً بالكامل باللغة العربية فقط.
 
 ⚠️ تعليمات حرجة ⚠️:
 - جميع ردودك يجب أن تكون بالكامل باللغة العربية (العربية)
 - لا تستخدم أي كلمات إنجليزية أو أحرف لاتينية
 - اكتب كل شيء بالعربية فقط
 - استخدم النص العربي الصحيح والتنسيق المناسب
-- لا ترد بالإنجليزية أبداً عندما يُطلب منك الرد بالعربية"""
-                        print(f"🌐 [call_llm] System message set to Arabic for model: {model_name}")
-                    else:
-                        print(f"ℹ️ [call_llm] System message set to English for model: {model_name}")
-                    
-                    payload = {
-                        "model": model_name,
-                        "messages": [
-                            {"role": "system", "content": system_message},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": 0.7,
-                        "max_tokens": 2048,
-                        "top_p": 1.0
-                    }
-                    
-                    print(f"🔍 [call_llm] Trying model: {model_name}")
-                    print(f"🔍 [call_llm] Prompt length: {len(prompt)} chars")
-                    
-                    try:
-                        response = requests.post(
-                            "https://api.groq.com/openai/v1/chat/completions",
-                            headers=headers,
-                            json=payload,
-                            timeout=60
-                        )
-                    except requests.exceptions.Timeout:
-                        raise Exception("Groq API request timed out after 60 seconds.")
-                    except requests.exceptions.ConnectionError as conn_err:
-                        raise Exception(f"Failed to connect to Groq API: {str(conn_err)}")
-                    
-                    print(f"🔍 [call_llm] Response status: {response.status_code}")
-                    
-                    if response.status_code == 401:
-                        error_detail = response.text[:500] if response.text else "No error details"
-                        print(f"❌ [call_llm] 401 Unauthorized - API key issue")
-                        raise Exception(f"Invalid GROQ_API_KEY (401). Please verify your API key. Error: {error_detail[:200]}")
-                    elif response.status_code == 400:
-                        error_detail = response.text[:500] if response.text else "No error details"
-                        print(f"⚠️ [call_llm] Model {model_name} returned 400: {error_detail[:200]}")
-                        last_error = f"Model {model_name}: {error_detail[:200]}"
-                        if model_name == models_to_try[-1]:
-                            raise Exception(f"All models failed. Last error: {last_error}")
-                        continue  # Try next model
-                    elif response.status_code == 429:
-                        error_detail = response.text[:500] if response.text else "No error details"
-                        raise Exception(f"Rate limit exceeded (429). Error: {error_detail[:200]}")
-                    elif response.status_code >= 500:
-                        error_detail = response.text[:500] if response.text else "No error details"
-                        print(f"⚠️ [call_llm] Server error {response.status_code} with {model_name}")
-                        last_error = f"Server error ({response.status_code}): {error_detail[:200]}"
-                        if model_name == models_to_try[-1]:
-                            raise Exception(f"All models failed. Last error: {last_error}")
-                        continue  # Try next model
-                    
-                    response.raise_for_status()
-                    
-                    try:
-                        result = response.json()
-                    except Exception as json_error:
-                        error_text = response.text[:500] if response.text else "No response"
-                        raise Exception(f"Failed to parse JSON: {str(json_error)}. Response: {error_text[:200]}")
-                    
-                    if 'choices' not in result or len(result['choices']) == 0:
-                        last_error = f"No choices returned: {str(result)[:200]}"
-                        if model_name == models_to_try[-1]:
-                            raise Exception(f"All models failed. Last error: {last_error}")
-                        continue  # Try next model
-                    
-                    content = result['choices'][0]['message']['content'].strip()
-                    print(f"✅ [call_llm] Success with {model_name} (length: {len(content)} chars)")
-                    return content
-                    
-                except Exception as model_error:
-                    error_str = str(model_error)
-                    if "401" in error_str or "Invalid GROQ_API_KEY" in error_str or "timed out" in error_str.lower() or "connect" in error_str.lower():
-                        raise  # Don't try other models for these errors
-                    last_error = error_str[:200]
-                    if model_name == models_to_try[-1]:
-                        raise Exception(f"All models failed. Last error: {last_error}")
-                    print(f"⚠️ [call_llm] {model_name} failed: {last_error}, trying next...")
-                    continue
-            
-            raise Exception(f"All models failed: {last_error}")
+- لا ترد بالإنجليزية أبداً عندما يُطلب منك الرد بالعربية""",
+    ("llama", "english"): _LLAMA_SYSTEM_PROMPT,
+    ("llama", "arabic"): _LLAMA_SYSTEM_PROMPT + _ARABIC_REQUIREMENT,
+    ("chatgpt", "english"): _CHATGPT_SYSTEM_PROMPT,
+    ("chatgpt", "arabic"): _CHATGPT_SYSTEM_PROMPT + _ARABIC_REQUIREMENT,
+    ("uniguru", "english"): _HELPFUL_SYSTEM_PROMPT,
+    ("uniguru", "arabic"): _HELPFUL_SYSTEM_PROMPT + _ARABIC_REQUIREMENT,
+}
+
+# Arabic-only instructions sent by call_groq_llama3 as a second system message
+ARABIC_RESPONSE_INSTRUCTIONS = """أنت مساعد ذكي يجب أن يرد دائماً باللغة العربية فقط.
 
-        elif llm == "llama":
-            # Use Groq API with larger LLaMA model
-            if not groq_api_key:
-                raise Exception("GROQ_API_KEY environment variable is not set or is empty")
-            
-            # Remove any quotes or whitespace from API key
-            groq_api_key = groq_api_key.strip().strip('"').strip("'")
-            
-            if not groq_api_key or len(groq_api_key) < 10:
-                raise Exception(f"GROQ_API_KEY appears to be invalid (length: {len(groq_api_key)})")
-            
-            headers = {
-                "Authorization": f"Bearer {groq_api_key}",
-                "Content-Type": "application/json"
-            }
-            # Add a system message to make LLaMA responses more distinctive
-            system_message = "You are LLaMA, a helpful, harmless, and honest AI assistant. You provide detailed, thoughtful responses with a focus on being educational and comprehensive."
-            if language and str(language).lower() == "arabic":
-                system_message = "You are LLaMA, a helpful, harmless, and honest AI assistant. You provide detailed, thoughtful responses with a focus on being educational and comprehensive. CRITICAL: You MUST respond ENTIRELY in Arabic (العربية). All your responses must be in Arabic using proper Arabic script and formatting. Never respond in English when Arabic is requested."
-            
-            payload = {
-                "model": "llama-3.3-70b-versatile",  # Larger LLaMA model
-                "messages": [
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7,  # Balanced temperature
-                "max_tokens": 2048,  # Increased for better summaries
-                "top_p": 1.0
-            }
+تعليمات صارمة:
+1. يجب أن تكون إجابتك بالكامل باللغة العربية
+2. لا تستخدم أي كلمات إنجليزية أبداً
+3. استخدم الحروف العربية فقط
+4. حتى لو كان السؤال بالإنجليزية، أجب بالعربية
 
-            print(f"🔍 [call_llm] Sending request to Groq API...")
-            print(f"🔍 [call_llm] Model: {payload['model']}, Max tokens: {payload['max_tokens']}")
-            
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60  # Increased timeout for longer responses
-            )
-            
-            print(f"🔍 [call_llm] Response status: {response.status_code}")
-            
-            # Better error handling with detailed messages
-            if response.status_code == 401:
-                error_detail = response.text[:200] if response.text else "No error details"
-                raise Exception(f"Invalid GROQ_API_KEY (401 Unauthorized). Error: {error_detail}")
-            elif response.status_code == 429:
-                error_detail = response.text[:200] if response.text else "No error details"
-                raise Exception(f"Rate limit exceeded (429). Please try again later. Error: {error_detail}")
-            elif response.status_code >= 500:
-                error_detail = response.text[:200] if response.text else "No error details"
-                raise Exception(f"Groq API server error ({response.status_code}). Error: {error_detail}")
-            
-            response.raise_for_status()
-            
-            try:
-                result = response.json()
-            except Exception as json_error:
-                raise Exception(f"Failed to parse JSON response from Groq API: {str(json_error)}. Response: {response.text[:200]}")
-            
-            if 'choices' not in result or len(result['choices']) == 0:
-                raise Exception(f"Invalid response from Groq API: no choices returned. Response: {str(result)[:200]}")
-            
-            content = result['choices'][0]['message']['content'].strip()
-            print(f"✅ [call_llm] Successfully received response from Groq API (length: {len(content)} chars)")
-            return content
-
-        elif llm == "chatgpt":
-            # Use Groq API with LLaMA 3.1 model as ChatGPT alternative
-            if not groq_api_key:
-                raise Exception("GROQ_API_KEY environment variable is not set or is empty")
-            
-            # Remove any quotes or whitespace from API key
-            groq_api_key = groq_api_key.strip().strip('"').strip("'")
-            
-            if not groq_api_key or len(groq_api_key) < 10:
-                raise Exception(f"GROQ_API_KEY appears to be invalid (length: {len(groq_api_key)})")
-            
-            headers = {
-                "Authorization": f"Bearer {groq_api_key}",
-                "Content-Type": "application/json"
-            }
-            system_message = "You are ChatGPT, a helpful AI assistant created by OpenAI. You provide clear, accurate, and helpful responses."
-            if language and str(language).lower() == "arabic":
-                system_message = "You are ChatGPT, a helpful AI assistant created by OpenAI. You provide clear, accurate, and helpful responses. CRITICAL: You MUST respond ENTIRELY in Arabic (العربية). All your responses must be in Arabic using proper Arabic script and formatting. Never respond in English when Arabic is requested."
-            
-            payload = {
-                "model": "llama-3.1-8b-instant",  # Using LLaMA 3.1 for ChatGPT
-                "messages": [
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt}
-                ],
-                "temperature": 0.7,
-                "max_tokens": 2048  # Increased for better summaries
-            }
+تذكر: يجب أن تكون الإجابة بالكامل باللغة العربية!"""
 
-            print(f"🔍 [call_llm] Sending request to Groq API...")
-            print(f"🔍 [call_llm] Model: {payload['model']}, Max tokens: {payload['max_tokens']}")
-            
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60  # Increased timeout for longer responses
-            )
-            
-            print(f"🔍 [call_llm] Response status: {response.status_code}")
-            
-            # Better error handling with detailed messages
+# System turn for LLM-based English -> Arabic translation; the text to
+# translate is sent untouched as the user turn
+ARABIC_TRANSLATION_INSTRUCTIONS = """You are a professional translator. Translate the user's English text to Arabic (العربية).
+
+⚠️ CRITICAL REQUIREMENTS:
+- You MUST translate the ENTIRE text to Arabic
+- Use proper Arabic script (العربية)
+- Maintain the exact same structure, sections, and formatting
+- Translate ALL text including section headers (e.g. "Overview", "Key Points", "Important Details", "Conclusions") and technical terms
+- Do NOT leave any English words untranslated
+- The output must be 100% in Arabic
+
+Reply with the complete Arabic translation only."""
+
+# Any character in the Arabic Unicode block (U+0600-U+06FF)
+_ARABIC_RE = re.compile(r"[\u0600-\u06FF]")
+# Replies whose letters are mostly Arabic already skip translation
+ARABIC_SKIP_RATIO = 0.5
+
+def _is_mostly_arabic(text: str) -> bool:
+    letters = sum(ch.isalpha() for ch in text)
+    return letters > 0 and len(_ARABIC_RE.findall(text)) / letters > ARABIC_SKIP_RATIO
+
+@lru_cache(maxsize=32)
+def _system_tag(extra_system: str) -> str:
+    """Cache-key suffix for a static extra system prompt (hashed once per prompt)"""
+    return "+" + hashlib.sha1(extra_system.encode("utf-8")).hexdigest()[:8]
+
+async def call_llm(prompt: str, llm: str, language: str = "english", extra_system: Optional[str] = None) -> str:
+    """
+    Call the specified LLM API with the given prompt, serving repeated or
+    near-duplicate prompts from the semantic cache.
+
+    extra_system is an optional static instruction block sent as a second
+    system message after the (llm, language) system prompt.
+    """
+    if not LLM_CACHE_ENABLED:
+        return await _call_llm_uncached(prompt, llm, language, extra_system)
+
+    cache_language = language + _system_tag(extra_system) if extra_system else language
+    hit = await asyncio.to_thread(llm_cache.lookup, prompt, llm, cache_language)
+    if hit.response is not None:
+        return hit.response
+
+    response = await _call_llm_uncached(prompt, llm, language, extra_system)
+    await asyncio.to_thread(llm_cache.insert, prompt, llm, cache_language, response, hit.embedding)
+    return response
+
+@dataclass(frozen=True)
+class LLMConfig:
+    """How to reach one chat-completions backend; models are tried in order"""
+    url: Callable[[], str]
+    headers: Callable[[], dict]
+    models: Tuple[str, ...]
+    extra_params: dict = field(default_factory=dict)
+
+GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+_LLM_CONFIGS = {
+    # Groq API with reliable LLaMA models, automatic fallback to the smaller one
+    "grok": LLMConfig(
+        url=lambda: GROQ_CHAT_URL,
+        headers=_groq_headers,
+        models=("llama-3.1-70b-versatile", "llama-3.1-8b-instant"),
+        extra_params={"top_p": 1.0},
+    ),
+    # Groq API with larger LLaMA model
+    "llama": LLMConfig(
+        url=lambda: GROQ_CHAT_URL,
+        headers=_groq_headers,
+        models=("llama-3.3-70b-versatile",),
+        extra_params={"top_p": 1.0},
+    ),
+    # Groq API with LLaMA 3.1 model as ChatGPT alternative
+    "chatgpt": LLMConfig(
+        url=lambda: GROQ_CHAT_URL,
+        headers=_groq_headers,
+        models=("llama-3.1-8b-instant",),
+    ),
+    # UniGuru API (Llama model) via ngrok
+    "uniguru": LLMConfig(
+        url=lambda: UNIGURU_URL,
+        headers=lambda: UNIGURU_HEADERS,
+        models=("llama3.1",),
+    ),
+}
+
+def _chat_messages(llm: str, prompt: str, language: str, extra_system: Optional[str] = None) -> list:
+    """Static system prompt(s) followed by the user turn"""
+    language_key = "arabic" if language and str(language).lower() == "arabic" else "english"
+    messages = [{"role": "system", "content": SYSTEM_PROMPTS[(llm, language_key)]}]
+    if extra_system:
+        messages.append({"role": "system", "content": extra_system})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+# Circuit breaker per model: after BREAKER_THRESHOLD consecutive 429/5xx replies
+# the model is skipped for BREAKER_COOLDOWN seconds, so requests go straight to
+# the fallback instead of paying for a call that is likely to fail.
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+@dataclass
+class Breaker:
+    fail_count: int = 0
+    opened_at: float = 0.0
+
+    def is_open(self) -> bool:
+        return bool(self.opened_at) and time.monotonic() - self.opened_at < BREAKER_COOLDOWN
+
+    def record_failure(self) -> None:
+        self.fail_count += 1
+        # A failed trial call after the cooldown reopens the breaker straight away
+        if self.opened_at or self.fail_count >= BREAKER_THRESHOLD:
+            self.opened_at = time.monotonic()
+            self.fail_count = 0
+
+    def record_success(self) -> None:
+        self.fail_count = 0
+        self.opened_at = 0.0
+
+_BREAKERS: dict = defaultdict(Breaker)
+
+async def _post_chat(llm: str, cfg: LLMConfig, prompt: str, language: str,
+                     extra_system: Optional[str] = None) -> str:
+    """
+    POST a chat completion to cfg, moving on to the next model on 400, 429,
+    5xx, unparseable or empty replies. 401s and transport errors abort.
+    """
+    url, headers = cfg.url(), cfg.headers()
+    messages = _chat_messages(llm, prompt, language, extra_system)
+
+    last_error = None
+    for model_name in cfg.models:
+        breaker = _BREAKERS[model_name]
+        if breaker.is_open():
+            last_error = f"Model {model_name} skipped: circuit open after repeated failures"
+            continue
+        payload = {
+            "model": model_name,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": 2048,
+            **cfg.extra_params
+        }
+        logger.debug("[call_llm] Trying %s model %s (prompt length: %d chars)", llm, model_name, len(prompt))
+        response = await _HTTP.post(url, headers=headers, json=payload)
+        logger.debug("[call_llm] %s responded %d", model_name, response.status_code)
+
+        if response.status_code == 401:
+            raise Exception(f"Invalid API key for {llm} (401 Unauthorized). Error: {response.text[:200]}")
+        if response.status_code in (400, 429) or response.status_code >= 500:
+            if response.status_code != 400:
+                breaker.record_failure()
+            last_error = f"Model {model_name} returned {response.status_code}: {response.text[:200]}"
+            logger.warning("[call_llm] %s", last_error)
+            continue
+        response.raise_for_status()
+        breaker.record_success()
+
+        try:
+            result = _json_loads(response.content)
+        except ValueError as json_error:
+            last_error = f"Failed to parse JSON from {model_name}: {json_error}. Response: {response.text[:200]}"
+            continue
+        if not result.get('choices'):
+            last_error = f"No choices returned by {model_name}: {str(result)[:200]}"
+            continue
+
+        content = result['choices'][0]['message']['content'].strip()
+        logger.debug("[call_llm] Success with %s (length: %d chars)", model_name, len(content))
+        return content
+
+    raise Exception(f"All models failed. Last error: {last_error}")
+
+async def _stream_chat(llm: str, cfg: LLMConfig, prompt: str, language: str = "english") -> AsyncIterator[str]:
+    """
+    Stream a chat completion from cfg (OpenAI-style SSE), yielding content
+    deltas as they arrive. Moves to the next model if one is refused.
+    """
+    url, headers = cfg.url(), cfg.headers()
+    messages = _chat_messages(llm, prompt, language)
+
+    last_error = None
+    for model_name in cfg.models:
+        breaker = _BREAKERS[model_name]
+        if breaker.is_open():
+            last_error = f"Model {model_name} skipped: circuit open after repeated failures"
+            continue
+        payload = {
+            "model": model_name,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": 2048,
+            "stream": True,
+            **cfg.extra_params
+        }
+        async with _HTTP.stream("POST", url, headers=headers, json=payload) as response:
             if response.status_code == 401:
-                error_detail = response.text[:200] if response.text else "No error details"
-                raise Exception(f"Invalid GROQ_API_KEY (401 Unauthorized). Error: {error_detail}")
-            elif response.status_code == 429:
-                error_detail = response.text[:200] if response.text else "No error details"
-                raise Exception(f"Rate limit exceeded (429). Please try again later. Error: {error_detail}")
-            elif response.status_code >= 500:
-                error_detail = response.text[:200] if response.text else "No error details"
-                raise Exception(f"Groq API server error ({response.status_code}). Error: {error_detail}")
-            
-            response.raise_for_status()
-            
-            try:
-                result = response.json()
-            except Exception as json_error:
-                raise Exception(f"Failed to parse JSON response from Groq API: {str(json_error)}. Response: {response.text[:200]}")
-            
-            if 'choices' not in result or len(result['choices']) == 0:
-                raise Exception(f"Invalid response from Groq API: no choices returned. Response: {str(result)[:200]}")
-            
-            content = result['choices'][0]['message']['content'].strip()
-            print(f"✅ [call_llm] Successfully received response from Groq API (length: {len(content)} chars)")
-            return content
-
-        elif llm == "uniguru":
-            # UniGuru API (Llama model) via ngrok
-            uniguru_url = os.getenv("UNIGURU_NGROK_ENDPOINT", "https://3a46c48e4d91.ngrok-free.app") + "/v1/chat/completions"
-            print(f"🔍 [call_llm] Using UniGuru endpoint: {uniguru_url}")
-            logger.info(f"Calling UniGuru API at: {uniguru_url}")
-            
-            headers = {
-                "Content-Type": "application/json",
-                "ngrok-skip-browser-warning": "true"
-            }
-            # Create system message with language requirement if Arabic
-            system_message = "You are a helpful AI assistant that provides detailed, comprehensive summaries and analysis."
-            if language and str(language).lower() == "arabic":
-                system_message = "You are a helpful AI assistant that provides detailed, comprehensive summaries and analysis. CRITICAL: You MUST respond ENTIRELY in Arabic (العربية). All your responses must be in Arabic using proper Arabic script and formatting. Never respond in English when Arabic is requested."
-            
-            data = {
-                "model": "llama3.1",
-                "messages": [
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": 2048,
-                "temperature": 0.7
-            }
+                raise Exception(f"Invalid API key for {llm} (401 Unauthorized)")
+            if response.status_code != 200:
+                if response.status_code == 429 or response.status_code >= 500:
+                    breaker.record_failure()
+                body = await response.aread()
+                last_error = f"Model {model_name} returned {response.status_code}: {body[:200]!r}"
+                logger.warning("[call_llm] %s", last_error)
+                continue
 
-            print(f"🔍 [call_llm] Sending request to UniGuru...")
-            response = requests.post(uniguru_url, headers=headers, json=data, timeout=60)
-            response.raise_for_status()
-            result = response.json()
-            print(f"✅ [call_llm] UniGuru response received successfully")
-            return result['choices'][0]['message']['content'].strip()
+            breaker.record_success()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                choices = _json_loads(data).get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+            return
+
+    raise Exception(f"All models failed. Last error: {last_error}")
+
+async def _call_llm_uncached(prompt: str, llm: str, language: str = "english", extra_system: Optional[str] = None) -> str:
+    """
+    Call the specified LLM API with the given prompt.
+    """
+    logger.debug("Calling LLM: %s", llm)
 
-        else:
-            # Default fallback
-            response = llm_service.generate_response(prompt)
-            return response
+    try:
+        cfg = _LLM_CONFIGS.get(llm)
+        if cfg is not None:
+            return await _post_chat(llm, cfg, prompt, language, extra_system)
+        # Default fallback
+        return await asyncio.to_thread(_llm_service().generate_response, prompt)
 
-    except requests.exceptions.Timeout as e:
+    except httpx.TimeoutException as e:
         error_msg = f"Timeout calling {llm.upper()} API: {str(e)}"
-        print(f"❌ Timeout calling {llm} API: {e}")
         logger.error(error_msg)
         raise Exception(error_msg)
-    except requests.exceptions.ConnectionError as e:
+    except httpx.ConnectError as e:
         error_msg = f"Connection error calling {llm.upper()} API: {str(e)}"
-        print(f"❌ Connection error calling {llm} API: {e}")
         logger.error(error_msg)
         raise Exception(error_msg)
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         error_msg = f"Failed to generate response from {llm.upper()} API: {str(e)}"
-        print(f"❌ Error calling {llm} API: {e}")
-        print(f"❌ Error details: {type(e).__name__}: {str(e)}")
-        logger.error(error_msg)
+        logger.error("%s (%s)", error_msg, type(e).__name__)
         # Include more details in error message
-        if hasattr(e, 'response') and e.response is not None:
+        if isinstance(e, httpx.HTTPStatusError):
             try:
                 error_detail = e.response.json()
                 error_msg += f" | Response: {str(error_detail)[:300]}"
@@ -595,98 +827,264 @@ def call_llm(prompt: str, llm: str, language: str = "english") -> str:
         raise Exception(error_msg)
     except Exception as e:
         error_msg = f"Unexpected error with {llm}: {str(e)}"
-        print(f"❌ Unexpected error with {llm}: {e}")
-        print(f"❌ Error type: {type(e).__name__}")
         logger.error(error_msg, exc_info=True)
         raise Exception(error_msg)
 
-def call_groq_llama3(prompt: str, language: str = "english") -> str:
-    """Enhanced LLM function with STRONG language enforcement"""
-    print("\n" + "="*80)
-    print("🔍 DEBUG: call_groq_llama3 function called")
-    print(f"🌐 Language parameter received: {language}")
-    print(f"📝 Original prompt: {prompt[:200]}...")
-    print("="*80 + "\n")
-    
-    try:
-        # CRITICAL: Add extremely strong Arabic instruction
-        if language.lower() == "arabic":
-            enhanced_prompt = f"""أنت مساعد ذكي يجب أن يرد دائماً باللغة العربية فقط.
+# Models tried, in order, after a document/image summary fails with the requested llm
+DOCUMENT_LLM_FALLBACKS = {"grok": ("llama", "chatgpt")}
 
-تعليمات صارمة:
-1. يجب أن تكون إجابتك بالكامل باللغة العربية
-2. لا تستخدم أي كلمات إنجليزية أبداً
-3. استخدم الحروف العربية فقط
-4. حتى لو كان السؤال بالإنجليزية، أجب بالعربية
+async def _call_llm_with_fallback(prompt: str, models: Tuple[str, ...], language: str = "english",
+                                  primary: Optional[Callable] = None) -> Tuple[str, str]:
+    """
+    Try each model in order and return (reply, model used). An empty reply
+    counts as a failure; ``primary`` replaces call_llm for the first attempt.
+    """
+    errors = []
+    for i, model in enumerate(dict.fromkeys(models)):
+        call = primary if i == 0 and primary is not None else call_llm
+        try:
+            reply = await call(prompt, model, language)
+            if reply and reply.strip():
+                return reply, model
+            raise Exception("Empty response from LLM")
+        except Exception as e:
+            logger.warning("⚠️ %s failed: %s", model, e)
+            errors.append(f"{model}: {str(e)[:200]}")
+    raise Exception("All LLM models failed. " + ", ".join(errors))
 
-سؤال المستخدم: {prompt}
+# Chat prompts arriving within LLM_BATCH_WINDOW of each other are dispatched
+# together; identical (prompt, llm, language) requests in a batch share one call
+LLM_BATCH_MAX = 8
+LLM_BATCH_WINDOW = 0.02  # seconds
 
-تذكر: يجب أن تكون الإجابة بالكامل باللغة العربية!"""
-            
-            print("\n" + "="*80)
-            print("🌐 USING ARABIC ENHANCED PROMPT:")
-            print(enhanced_prompt[:500] + "...")
-            print("="*80 + "\n")
+class LLMBatcher:
+    """
+    Micro-batching front for call_llm. Groq has no multi-prompt endpoint, so
+    a batch is sent as concurrent requests over the shared HTTP pool.
+    """
+
+    def __init__(self, max_batch: int = LLM_BATCH_MAX, window: float = LLM_BATCH_WINDOW):
+        self.max_batch = max_batch
+        self.window = window
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._inflight = set()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, prompt: str, llm: str, language: str = "english") -> str:
+        if self._task is None:
+            return await call_llm(prompt, llm, language)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((prompt, llm, language), future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = await _collect_batch(self._queue, self.max_batch, self.window)
+            groups = defaultdict(list)
+            for key, future in batch:
+                groups[key].append(future)
+            # Dispatch without waiting so the next batch can start collecting
+            task = asyncio.create_task(self._dispatch(groups))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    @staticmethod
+    async def _dispatch(groups: dict):
+        results = await asyncio.gather(*(call_llm(*key) for key in groups), return_exceptions=True)
+        for futures, result in zip(groups.values(), results):
+            for future in futures:
+                if future.done():
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+llm_batcher = LLMBatcher()
+
+# Concurrent checkpoint-model translations (/chatbot, /process-pdf and
+# /process-img) are coalesced into one batched generate() on the model
+TRANSLATION_BATCH_MAX = 8
+TRANSLATION_BATCH_WINDOW = 0.025  # seconds
+TRANSLATION_CACHE_SIZE = 1024
+
+class CheckpointTranslator:
+    """
+    Batched, memoized front for the arabic_translator checkpoint model.
+    Batches run one at a time: the model is the bottleneck, so the next batch
+    collects everything that arrived while the previous one was generating.
+    Repeated texts (greetings, boilerplate) are served from an LRU cache.
+    """
+
+    def __init__(self, max_batch: int = TRANSLATION_BATCH_MAX, window: float = TRANSLATION_BATCH_WINDOW,
+                 cache_size: int = TRANSLATION_CACHE_SIZE):
+        self.max_batch = max_batch
+        self.window = window
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def available(self) -> bool:
+        translator = await asyncio.to_thread(_arabic_translator)
+        return translator is not None and translator.is_checkpoint_available()
+
+    async def translate(self, text: str) -> Optional[str]:
+        """Arabic translation of text, or None if the checkpoint model can't provide one"""
+        cached = self._cache.get(text)
+        if cached is not None:
+            self._cache.move_to_end(text)
+            return cached
+
+        if self._task is None:
+            result = (await self._translate_batch([text]))[0]
         else:
-            enhanced_prompt = prompt
-            print("\n" + "="*80)
-            print("🌐 USING ENGLISH PROMPT (no enhancement)")
-            print(enhanced_prompt[:200] + "...")
-            print("="*80 + "\n")
+            future = asyncio.get_running_loop().create_future()
+            await self._queue.put((text, future))
+            result = await future
+
+        if result:
+            self._cache[text] = result
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    async def _translate_batch(texts: List[str]) -> List[Optional[str]]:
+        translator = await asyncio.to_thread(_arabic_translator)
+        if translator is None:
+            return [None] * len(texts)
+        if len(texts) == 1:
+            return [await asyncio.to_thread(translator.translate_to_arabic_with_checkpoint, texts[0])]
+        return await asyncio.to_thread(translator.translate_many_with_checkpoint, texts)
+
+    async def _run(self):
+        while True:
+            batch = await _collect_batch(self._queue, self.max_batch, self.window)
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                results = dict(zip(texts, await self._translate_batch(texts)))
+            except Exception as e:
+                logger.error("[Backend] Checkpoint translation batch failed: %s", e)
+                results = {}
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(results.get(text))
+
+checkpoint_translator = CheckpointTranslator()
+
+@app.on_event("startup")
+async def _start_llm_batcher():
+    llm_batcher.start()
+    checkpoint_translator.start()
+
+async def call_groq_llama3(prompt: str, language: str = "english") -> str:
+    """Enhanced LLM function with STRONG language enforcement"""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("call_groq_llama3 language=%s prompt=%s...", language, prompt[:200])
+    
+    try:
+        # CRITICAL: Add extremely strong Arabic instruction as a separate static
+        # system message; the user prompt is sent untouched in its own turn
+        extra_system = ARABIC_RESPONSE_INSTRUCTIONS if language.lower() == "arabic" else None
         
-        # Use call_llm with the enhanced prompt (always in English for better reliability)
-        print("📤 Sending to call_llm...")
-        # Always generate in English first - translation will happen separately if needed
-        response = call_llm(enhanced_prompt, "grok", "english")
+        # Use call_llm with the English system prompt (better reliability)
+        response = await call_llm(prompt, "grok", "english", extra_system=extra_system)
         
         if not response or len(response.strip()) == 0:
             raise Exception("Empty response from LLM")
         
         # Verify language in response
-        has_arabic = bool(any('\u0600' <= c <= '\u06FF' for c in response))
-        print("\n" + "="*80)
-        print("📥 RECEIVED RESPONSE FROM LLM:")
-        print(f"Contains Arabic characters: {has_arabic}")
-        print(f"Response length: {len(response)}")
-        print(f"First 200 characters: {response[:200]}")
-        print("="*80 + "\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "call_groq_llama3 response: arabic=%s length=%d preview=%s",
+                _ARABIC_RE.search(response) is not None, len(response), response[:200]
+            )
         
         return response
-    except Exception as e:
-        print(f"❌ [Backend] Error in call_groq_llama3: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("[Backend] Error in call_groq_llama3")
         # Re-raise the exception so the caller can handle it properly
         # The chatbot endpoint will handle translation and fallbacks
         raise
 
 
+# Headers for every streamed response: no caching, and no buffering or
+# compression by a reverse proxy (nginx honours X-Accel-Buffering), so each
+# frame reaches the client as soon as it is sent
+_STREAM_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+    "Content-Encoding": "identity",
+}
+
+def _sse(payload: dict) -> bytes:
+    return b"data: " + _json_bytes(payload) + b"\n\n"
+
+async def _chatbot_event_stream(latest_query: dict, query_message: str, llm_model: str, language: str):
+    """
+    SSE body for /chatbot?stream=true: one {"token"} event per delta, then a
+    final {"done": true, ...} event carrying the same payload as the JSON
+    route once the full reply has been stored.
+    """
+    buffer = io.StringIO()
+    try:
+        hit = None
+        if LLM_CACHE_ENABLED:
+            hit = await asyncio.to_thread(llm_cache.lookup, query_message, llm_model, "english")
+        if hit is not None and hit.response is not None:
+            buffer.write(hit.response)
+            yield _sse({"token": hit.response})
+        else:
+            async for token in _stream_chat(llm_model, _LLM_CONFIGS[llm_model], query_message, "english"):
+                buffer.write(token)
+                yield _sse({"token": token})
+            if LLM_CACHE_ENABLED:
+                await asyncio.to_thread(
+                    llm_cache.insert, query_message, llm_model, "english",
+                    buffer.getvalue().strip(), hit.embedding if hit else None
+                )
+    except Exception as e:
+        logger.error("[Backend] Streaming %s response failed: %s", llm_model, e)
+        yield _sse({"error": f"Failed to process response:{str(e)}"})
+        return
+
+    response_data = {
+        "message": buffer.getvalue().strip(),
+        "timestamp": datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        "type": "chat_response",
+        "query_id": str(latest_query["_id"]),
+        "language": language,
+        "llm": llm_model
+    }
+    _store_chat_response(latest_query["_id"], response_data)
+    yield _sse({"done": True, "_id": str(latest_query["_id"]), "query": query_message, "response": response_data})
+
+
 # Route 2: Send LLM response back
 @app.get("/chatbot")
-async def send_response():
+async def send_response(stream: bool = Query(False, description="Stream tokens as server-sent events")):
     try:
-        # Fetch the latest query from MongoDB
-        latest_query = user_collection.find_one({"type": "chat_message", "response":None}, sort=[("timestamp", -1)])
+        latest_query = await _next_unanswered_query()
         if not latest_query:
             return {"error": "No queries yet"}
 
-        print("\n" + "="*80)
-        print("🔍 DEBUG: /chatbot endpoint called")
-        print("="*80 + "\n")
-        
         query_message = latest_query["message"]
         
         # CRITICAL: Get language from the stored query (try both 'llm' and 'llm_model' for compatibility)
         language = latest_query.get("language", "english")
         llm_model = latest_query.get("llm", latest_query.get("llm_model", "grok"))
         
-        print("\n" + "="*80)
-        print("📋 QUERY DETAILS FROM DATABASE:")
-        print(f"Query: {query_message}")
-        print(f"Language: {language} (type: {type(language)})")
-        print(f"Model: {llm_model}")
-        print(f"All fields: {list(latest_query.keys())}")
-        print("="*80 + "\n")
+        logger.debug("📋 [Backend] /chatbot query: %s (language=%r, model=%s)", query_message, language, llm_model)
         
         # Normalize language (treat any ar* locale as arabic)
         if not language:
@@ -695,112 +1093,83 @@ async def send_response():
         if language.startswith("ar"):
             language = "arabic"
         
-        print(f"🌐 [Backend] Processing query in {language}: {query_message}")
-        print(f"🤖 [Backend] Using model: {llm_model}")
-
-        # Generate response in English first using the user's selected model (better quality)
-        print(f"🚀 Generating response in English first using model: {llm_model}...")
+        # Token streaming is opt-in; Arabic replies are translated as a whole,
+        # so they always take the buffered path below
+        if stream and language != "arabic" and llm_model in _LLM_CONFIGS:
+            return StreamingResponse(
+                _chatbot_event_stream(latest_query, query_message, llm_model, language),
+                media_type="text/event-stream",
+                headers=_STREAM_HEADERS
+            )
+        
+        # Generate response in English first using the user's selected model (better quality),
+        # unless an Arabic answer was asked for in Arabic: then the Arabic system
+        # prompt is used directly and no translation pass is needed
+        generation_language = "arabic" if language == "arabic" and _is_mostly_arabic(query_message) else "english"
         try:
-            # Use the user's selected model directly (grok, llama, ollama, uniguru, etc.)
-            llm_reply = call_llm(query_message, llm_model, "english")
-            
-            if not llm_reply or len(llm_reply.strip()) == 0:
-                raise Exception("Empty response from LLM")
-                
-            print(f"✅ [Backend] Successfully generated response in English (length: {len(llm_reply)} chars)")
+            # Use the user's selected model directly (grok, llama, ollama, uniguru, etc.),
+            # falling back to Grok
+            llm_reply, used_model = await _call_llm_with_fallback(
+                query_message, (llm_model, "grok"), generation_language, primary=llm_batcher.submit
+            )
+            logger.debug("✅ [Backend] Generated response in %s with %s (length: %d chars)", generation_language, used_model, len(llm_reply))
         except Exception as e:
-            print(f"❌ [Backend] Error generating English response with {llm_model}: {e}")
-            # Try with grok as fallback
-            try:
-                print(f"⚠️ [Backend] Trying Grok as fallback...")
-                llm_reply = call_llm(query_message, "grok", "english")
-                if not llm_reply or len(llm_reply.strip()) == 0:
-                    raise Exception("Empty response from fallback LLM")
-                print(f"✅ [Backend] Successfully generated response using Grok fallback")
-            except Exception as fallback_error:
-                print(f"❌ [Backend] Fallback also failed: {fallback_error}")
-                raise Exception(f"Failed to generate response with {llm_model}: {str(e)}")
+            logger.error("❌ [Backend] Error generating response with %s: %s", llm_model, e)
+            raise Exception(f"Failed to generate response with {llm_model}: {str(e)}")
         
         # If Arabic is requested, translate the English response to Arabic using checkpoint_info.pkl
         translation_path = "none"  # track how translation was performed
-        if language == "arabic":
-            print(f"\n{'='*80}")
-            print(f"🌐 [Backend] Arabic translation requested - using checkpoint_info.pkl")
-            print(f"🌐 [Backend] Original response length: {len(llm_reply)} chars")
-            print(f"🌐 [Backend] Original response preview: {llm_reply[:200]}...")
-            print(f"{'='*80}\n")
+        if language == "arabic" and _is_mostly_arabic(llm_reply):
+            # The model already answered in Arabic; a second pass would only re-translate it
+            translation_path = "query_already_target" if generation_language == "arabic" else "skipped_already_arabic"
+            logger.debug("✅ [Backend] Reply is already Arabic, skipping translation")
+        elif language == "arabic":
+            logger.debug("🌐 [Backend] Arabic translation requested (%d chars)", len(llm_reply))
             
             try:
                 # STEP 1: Try checkpoint model first (checkpoint_info.pkl)
                 checkpoint_result = None
-                if ARABIC_TRANSLATOR_AVAILABLE and translate_to_arabic_with_checkpoint:
-                    print(f"🔄 [Backend] Attempting translation with checkpoint_info.pkl...")
+                if await checkpoint_translator.available():
+                    logger.debug("🔄 [Backend] Attempting translation with checkpoint_info.pkl...")
                     try:
-                        checkpoint_result = translate_to_arabic_with_checkpoint(llm_reply)
+                        checkpoint_result = await checkpoint_translator.translate(llm_reply)
                         if checkpoint_result and len(checkpoint_result.strip()) > 0:
                             llm_reply = checkpoint_result.strip()
                             translation_path = "checkpoint"
-                            print(f"✅ [Backend] Successfully translated using checkpoint_info.pkl")
-                            print(f"✅ [Backend] Translated response length: {len(llm_reply)} chars")
-                            print(f"✅ [Backend] Translated preview: {llm_reply[:200]}...")
+                            logger.debug("✅ [Backend] Translated using checkpoint_info.pkl (%d chars)", len(llm_reply))
                         else:
-                            print(f"⚠️ [Backend] Checkpoint model returned empty result, trying LLM fallback...")
+                            logger.warning("⚠️ [Backend] Checkpoint model returned empty result, trying LLM fallback...")
                             checkpoint_result = None
                     except Exception as checkpoint_error:
-                        print(f"⚠️ [Backend] Checkpoint translation error: {checkpoint_error}")
-                        import traceback
-                        print(f"⚠️ [Backend] Checkpoint error details: {traceback.format_exc()}")
+                        logger.warning("⚠️ [Backend] Checkpoint translation error: %s", checkpoint_error, exc_info=True)
                         checkpoint_result = None
                 
                 # STEP 2: Fallback to LLM translation if checkpoint failed or unavailable
                 if not checkpoint_result:
-                    print(f"🔄 [Backend] Using {llm_model} for LLM-based translation fallback...")
-                    translation_prompt = f"""You are a professional translator. Your task is to translate the following English text to Arabic (العربية).
-
-⚠️ CRITICAL REQUIREMENTS:
-- You MUST translate the ENTIRE text to Arabic
-- Use proper Arabic script (العربية)
-- Maintain the exact same structure and formatting
-- Translate ALL text including any technical terms naturally
-- Do NOT leave any English words untranslated
-- The output must be 100% in Arabic
-
-English Text to Translate:
-{llm_reply}
-
-Now provide the complete Arabic translation. Your response must be entirely in Arabic:"""
-                    
+                    logger.debug("🔄 [Backend] Using %s for LLM-based translation fallback...", llm_model)
                     try:
-                        translated_reply = call_llm(translation_prompt, llm_model, "english")
+                        translated_reply = await call_llm(llm_reply, llm_model, "english", extra_system=ARABIC_TRANSLATION_INSTRUCTIONS)
                         if translated_reply and len(translated_reply.strip()) > 0:
                             llm_reply = translated_reply.strip()
                             translation_path = "llm_fallback"
-                            print(f"✅ [Backend] Successfully translated using {llm_model} LLM fallback")
-                            print(f"✅ [Backend] Translated response length: {len(llm_reply)} chars")
-                            print(f"✅ [Backend] Translated preview: {llm_reply[:200]}...")
+                            logger.debug("✅ [Backend] Translated using %s LLM fallback (%d chars)", llm_model, len(llm_reply))
                         else:
-                            print(f"⚠️ [Backend] LLM translation returned empty, keeping original English")
+                            logger.warning("⚠️ [Backend] LLM translation returned empty, keeping original English")
                     except Exception as llm_error:
-                        print(f"❌ [Backend] LLM translation failed: {llm_error}")
-                        print(f"⚠️ [Backend] Keeping original English response due to translation failure")
+                        logger.error("❌ [Backend] LLM translation failed: %s", llm_error)
+                        logger.warning("⚠️ [Backend] Keeping original English response due to translation failure")
                 
             except Exception as translate_error:
-                print(f"❌ [Backend] Translation process failed with error: {translate_error}")
-                import traceback
-                print(f"❌ [Backend] Translation error traceback: {traceback.format_exc()}")
+                logger.exception("❌ [Backend] Translation process failed with error: %s", translate_error)
                 # Continue with English version if translation fails
-                print(f"⚠️ [Backend] Using original English response due to translation error")
+                logger.warning("⚠️ [Backend] Using original English response due to translation error")
         
-        # Log translation path for debugging
-        print(f"🧭 [Backend] translation_path: {translation_path}")
-
-        # Verify the response language
-        has_arabic = bool(any('\u0600' <= c <= '\u06FF' for c in llm_reply))
-        print("\n" + "="*80)
-        print("✅ FINAL RESPONSE READY:")
-        print(f"Contains Arabic: {has_arabic}")
-        print(f"Response preview: {llm_reply[:200]}")
-        print("="*80 + "\n")
+        # Log translation path and response language for debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "✅ [Backend] Response ready: translation_path=%s arabic=%s preview=%s",
+                translation_path, _ARABIC_RE.search(llm_reply) is not None, llm_reply[:200]
+            )
 
         timestamp = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
         response_data = {
@@ -815,10 +1184,7 @@ Now provide the complete Arabic translation. Your response must be entirely in A
         if language == "arabic":
             response_data["translation_path"] = translation_path
 
-        user_collection.update_one(
-            {"_id": latest_query["_id"]},
-            {"$set": {"response": response_data}}
-        )
+        _store_chat_response(latest_query["_id"], response_data)
 
         return {
             "_id": str(latest_query["_id"]),
@@ -827,47 +1193,63 @@ Now provide the complete Arabic translation. Your response must be entirely in A
         }
 
     except Exception as e:
-        print(f"❌ [Backend] Error in send_response: {e}")
+        logger.error("❌ [Backend] Error in send_response: %s", e)
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to process response:{str(e)}")
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
+def _copy_upload(src, path: str) -> None:
+    with open(path, "wb") as out:
+        shutil.copyfileobj(src, out, UPLOAD_CHUNK_SIZE)
+
+async def _save_upload(file: UploadFile, path: str) -> None:
+    """Write an upload to disk in bounded chunks without blocking the event loop"""
+    if not AIOFILES_AVAILABLE:
+        await asyncio.to_thread(_copy_upload, file.file, path)
+        return
+    async with aiofiles.open(path, "wb") as out:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await out.write(chunk)
+
+DOCUMENT_EXTENSIONS = frozenset({"pdf", "doc", "docx"})
+IMAGE_EXTENSIONS = frozenset({"jpg", "jpeg", "png"})
+
+def _file_ext(filename: Optional[str]) -> str:
+    """Lowercased extension without the dot ('' when there is none)"""
+    name = (filename or "").lower()
+    return name.rsplit(".", 1)[-1] if "." in name else ""
+
 @app.post("/process-pdf", response_model=PDFResponse)
 async def process_pdf(file: UploadFile = File(...), llm: str = Query("grok", description="LLM model to use (grok, llama, uniguru)"), language: str = Query("english", description="Language for summary (english, arabic)")):
     # Log the received parameters for debugging
-    print(f"🔍 [process_pdf] Received llm parameter: '{llm}' (type: {type(llm)})")
-    print(f"🔍 [process_pdf] Received language parameter: '{language}' (type: {type(language)})")
     
     # Ensure language is a string and normalize to lowercase
     original_language = language
     if not language:
         language = "english"
     language = str(language).lower().strip()
-    print(f"🔍 [process_pdf] Received language parameter: '{original_language}'")
-    print(f"🔍 [process_pdf] Normalized language: '{language}'")
-    print(f"🔍 [process_pdf] Will translate to Arabic: {language == 'arabic'}")
+    logger.debug("🔍 [process_pdf] llm=%r language=%r (normalized %r)", llm, original_language, language)
     
     logger.info(f"Processing PDF with LLM model: {llm}, language: {language}")
     
     temp_file_path = ""
     try:
         # Check file extension and validate supported formats
-        file_ext = file.filename.lower().split('.')[-1] if '.' in file.filename else ''
-        supported_formats = ['pdf', 'doc', 'docx']
-
-        if file_ext not in supported_formats:
+        file_ext = _file_ext(file.filename)
+        if file_ext not in DOCUMENT_EXTENSIONS:
             raise HTTPException(status_code=400, detail="Only PDF, DOC, and DOCX files are allowed")
 
         # Create temp file with appropriate extension
         temp_file_path = os.path.join(TEMP_DIR, f"temp_document_{time.strftime('%Y%m%d_%H%M%S')}.{file_ext}")
-        with open(temp_file_path, "wb") as temp_file:
-            shutil.copyfileobj(file.file, temp_file)
+        await _save_upload(file, temp_file_path)
 
         # Parse document based on file type
         if file_ext == 'pdf':
-            structured_data = parse_pdf(temp_file_path)
-        elif file_ext in ['doc', 'docx']:
-            structured_data = parse_word_document(temp_file_path)
+            structured_data = await _run_in_ocr_pool(parse_pdf, temp_file_path)
+        else:
+            structured_data = await parse_word_document(temp_file_path)
 
         if not structured_data["body"]:
             raise HTTPException(status_code=400, detail="Failed to parse document content")
@@ -875,13 +1257,16 @@ async def process_pdf(file: UploadFile = File(...), llm: str = Query("grok", des
         # Create a comprehensive prompt for document summarization
         document_content = structured_data["body"]
         
-        # Add language instruction if Arabic is selected
+        # Arabic summaries are written in English and translated when the
+        # checkpoint translator is available; otherwise the summary prompt asks
+        # for Arabic directly instead of paying for a second LLM round-trip
+        fuse_translation = language == "arabic" and not await checkpoint_translator.available()
         language_instruction = ""
-        if language == "arabic":
+        if fuse_translation:
             language_instruction = "\n\n⚠️ CRITICAL LANGUAGE REQUIREMENT ⚠️\nYou MUST generate the ENTIRE summary in Arabic (العربية). This is mandatory.\n- All content including overview, key points, important details, and conclusions MUST be in Arabic\n- Use proper Arabic script and formatting\n- Write all text in Arabic, not English\n- Do NOT include any English text in your response\n\n"
-            print(f"✅ [process_pdf] Arabic language instruction added to prompt")
+            logger.debug("✅ [process_pdf] Arabic language instruction added to prompt")
         else:
-            print(f"ℹ️ [process_pdf] Using English (language: '{language}')")
+            logger.debug("ℹ️ [process_pdf] Using English (language: '%s')", language)
         
         prompt = f"""{language_instruction}Please provide a detailed summary of the following document in a clean, well-structured format:
 
@@ -913,90 +1298,47 @@ Conclusions & Insights
 IMPORTANT: Format your response with clear sections and bullet points for easy reading. Do NOT use markdown formatting like ** or * symbols. Use plain text with clear section headers. Make it comprehensive yet concise, focusing on the most valuable information."""
 
         # Use the selected LLM model for summarization with automatic fallback
-        print(f"🔍 [process_pdf] Calling call_llm with llm='{llm}'")
+        logger.debug("🔍 [process_pdf] Calling call_llm with llm='%s'", llm)
         logger.info(f"Calling LLM with model: {llm}")
         
         # Check API key before calling
         groq_key_check = os.environ.get('GROQ_API_KEY', '').strip()
-        print(f"🔍 [process_pdf] GROQ_API_KEY check: present={bool(groq_key_check)}, length={len(groq_key_check)}")
+        logger.debug("🔍 [process_pdf] GROQ_API_KEY check: present=%s, length=%d", bool(groq_key_check), len(groq_key_check))
         
-        try:
-            # Always generate in English first for better quality
-            answer = call_llm(prompt, llm, "english")
-        except Exception as e:
-            error_str = str(e)
-            print(f"❌ [process_pdf] Error with {llm}: {error_str}")
-            
-            # If grok fails, automatically try llama as fallback
-            if llm == "grok":
-                print(f"⚠️ [process_pdf] Grok failed, trying Llama as fallback...")
-                logger.warning(f"Grok failed: {error_str}, falling back to Llama")
-                try:
-                    answer = call_llm(prompt, "llama", "english")
-                    llm = "llama"  # Update llm to reflect what was actually used
-                    print(f"✅ [process_pdf] Successfully used Llama as fallback")
-                except Exception as llama_error:
-                    llama_error_str = str(llama_error)
-                    print(f"❌ [process_pdf] Llama also failed: {llama_error_str}")
-                    # If llama also fails, try with increased tokens and different model
-                    print(f"⚠️ [process_pdf] Trying llama-3.1-8b-instant as final fallback...")
-                    try:
-                        answer = call_llm(prompt, "chatgpt", "english")  # Uses llama-3.1-8b-instant
-                        llm = "chatgpt"
-                        print(f"✅ [process_pdf] Successfully used llama-3.1-8b-instant")
-                    except Exception as final_error:
-                        final_error_str = str(final_error)
-                        print(f"❌ [process_pdf] All models failed!")
-                        raise Exception(f"All LLM models failed. Grok: {error_str[:200]}, Llama: {llama_error_str[:200]}, Llama-3.1: {final_error_str[:200]}")
-            else:
-                # If not grok, just raise the original error
-                raise
+        # English unless the Arabic translation was fused into the prompt above;
+        # llm is updated to reflect the model actually used
+        answer, llm = await _call_llm_with_fallback(prompt, (llm,) + DOCUMENT_LLM_FALLBACKS.get(llm, ()), "english")
         
         # If Arabic is requested, translate the English summary to Arabic
-        print(f"🔍 [process_pdf] Checking if translation needed. Language value: '{language}', Type: {type(language)}, == 'arabic': {language == 'arabic'}")
-        if language == "arabic":
-            print(f"🌐 [process_pdf] ✓ Language is Arabic, translating summary to Arabic...")
-            print(f"🌐 [process_pdf] Original answer length: {len(answer)} chars")
-            print(f"🌐 [process_pdf] Original answer preview: {answer[:200]}...")
+        if language == "arabic" and (_is_mostly_arabic(answer) or fuse_translation and _ARABIC_RE.search(answer) is not None):
+            logger.debug("✅ [process_pdf] Summary generated directly in Arabic, skipping translation")
+        elif language == "arabic":
+            logger.debug("🌐 [process_pdf] Translating summary to Arabic (%d chars)", len(answer))
             try:
                 # Use checkpoint model for translation (with LLM fallback)
-                if ARABIC_TRANSLATOR_AVAILABLE:
-                    print(f"🌐 [process_pdf] Using checkpoint model for translation (with LLM fallback)...")
-                    translated_answer = translate_to_arabic(answer, fallback_llm_func=call_llm)
-                else:
-                    # Fallback to direct LLM translation
-                    print(f"🌐 [process_pdf] Checkpoint model not available, using LLM translation...")
-                    translation_prompt = f"""You are a professional translator. Your task is to translate the following English text to Arabic (العربية).
-
-⚠️ CRITICAL REQUIREMENTS:
-- You MUST translate the ENTIRE text to Arabic
-- Use proper Arabic script (العربية)
-- Maintain the exact same structure, sections, and formatting
-- Translate ALL text including section headers like "Overview", "Key Points", "Important Details", "Conclusions"
-- Do NOT leave any English words untranslated
-- The output must be 100% in Arabic
-
-English Text to Translate:
-{answer}
-
-Now provide the complete Arabic translation. Your response must be entirely in Arabic:"""
-                    translated_answer = call_llm(translation_prompt, llm, "english")
-                
-                print(f"🌐 [process_pdf] Translation response received, length: {len(translated_answer) if translated_answer else 0}")
+                translated_answer = None
+                if not fuse_translation:
+                    logger.debug("🌐 [process_pdf] Using checkpoint model for translation (with LLM fallback)...")
+                    translated_answer = await checkpoint_translator.translate(answer)
+                if not translated_answer:
+                    logger.debug("🌐 [process_pdf] Checkpoint translation not available, using LLM translation...")
+                    translated_answer = await call_llm(answer, llm, "english", extra_system=ARABIC_TRANSLATION_INSTRUCTIONS)
                 
                 if translated_answer and len(translated_answer.strip()) > 0:
                     answer = translated_answer.strip()
-                    print(f"✅ [process_pdf] Successfully translated summary to Arabic (length: {len(answer)} chars)")
-                    print(f"✅ [process_pdf] Translated answer preview: {answer[:200]}...")
+                    logger.debug("✅ [process_pdf] Translated summary to Arabic (%d chars)", len(answer))
                 else:
-                    print(f"⚠️ [process_pdf] Translation returned empty, using original English")
+                    logger.warning("⚠️ [process_pdf] Translation returned empty, using original English")
             except Exception as translate_error:
-                print(f"❌ [process_pdf] Translation failed with error: {translate_error}")
-                import traceback
-                print(f"❌ [process_pdf] Translation error traceback: {traceback.format_exc()}")
+                logger.exception("❌ [process_pdf] Translation failed with error: %s", translate_error)
                 # Continue with English version if translation fails
 
-        audio_file = text_to_speech(answer, file_prefix="output_pdf")
+        # gTTS is a blocking network call; run it in a worker thread while the
+        # stored and returned sections are built
+        audio_task = asyncio.create_task(asyncio.to_thread(text_to_speech, answer, file_prefix="output_pdf"))
+        sections = [{"heading": s["heading"], "content": s["content"]} for s in structured_data["sections"]]
+        response_sections = [Section(**s) for s in sections]
+        audio_file = await audio_task
         audio_url = f"/api/stream/{os.path.basename(audio_file)}" if audio_file else "No audio generated"
 
         # Store to MongoDB
@@ -1004,18 +1346,18 @@ Now provide the complete Arabic translation. Your response must be entirely in A
             "filename": file.filename,
             "file_type": file_ext,
             "title": structured_data["title"],
-            "sections": [{"heading": s["heading"], "content": s["content"]} for s in structured_data["sections"]],
+            "sections": sections,
             "summary": answer,
             "llm_model": llm,
             "audio_file": audio_url,
             "timestamp": datetime.now(timezone.utc)
         }
-        pdf_collection.insert_one(pdf_doc)
+        _write_in_background(pdf_collection.insert_one, pdf_doc)
 
         global pdf_response
         pdf_response = PDFResponse(
             title=structured_data["title"],
-            sections=[Section(heading=s["heading"], content=s["content"]) for s in structured_data["sections"]],
+            sections=response_sections,
             query=f"Document summary using {llm.upper()} model",
             answer=answer,
             audio_file=audio_url,
@@ -1035,31 +1377,29 @@ Now provide the complete Arabic translation. Your response must be entirely in A
 @app.post("/process-img", response_model=ImageResponse)
 async def process_image(file: UploadFile = File(...), llm: str = Query("grok", description="LLM model to use (grok, llama, uniguru)"), language: str = Query("english", description="Language for summary (english, arabic)")):
     # Log the received parameters for debugging
-    print(f"🔍 [process_image] Received llm parameter: '{llm}' (type: {type(llm)})")
-    print(f"🔍 [process_image] Received language parameter: '{language}' (type: {type(language)})")
     
     # Ensure language is a string and normalize to lowercase
     if not language:
         language = "english"
     language = str(language).lower().strip()
-    print(f"🔍 [process_image] Normalized language: '{language}'")
+    logger.debug("🔍 [process_image] llm=%r language=%r", llm, language)
     
     logger.info(f"Processing image with LLM model: {llm}, language: {language}")
     
     temp_image_path = ""
     try:
-        if not file.filename.lower().endswith((".jpg", ".jpeg", ".png")):
+        file_ext = _file_ext(file.filename)
+        if file_ext not in IMAGE_EXTENSIONS:
             raise HTTPException(status_code=400, detail="Only JPG, JPEG, or PNG files are allowed")
 
         temp_image_path = os.path.join(
             TEMP_DIR,
-            f"temp_image_{time.strftime('%Y%m%d_%H%M%S')}{os.path.splitext(file.filename)[1]}"
+            f"temp_image_{time.strftime('%Y%m%d_%H%M%S')}.{file_ext}"
         )
 
-        with open(temp_image_path, "wb") as temp_file:
-            shutil.copyfileobj(file.file, temp_file)
+        await _save_upload(file, temp_image_path)
 
-        ocr_text = extract_text_easyocr(temp_image_path).strip()
+        ocr_text = (await _run_in_ocr_pool(extract_text_easyocr, temp_image_path)).strip()
         logger.info(f"OCR raw output: {repr(ocr_text)}")
 
         if not ocr_text:
@@ -1071,9 +1411,9 @@ async def process_image(file: UploadFile = File(...), llm: str = Query("grok", d
             language_instruction = ""
             if language == "arabic":
                 language_instruction = "\n\n⚠️ CRITICAL LANGUAGE REQUIREMENT ⚠️\nYou MUST generate the ENTIRE analysis in Arabic (العربية). This is mandatory.\n- All content including summary, key information, context, and insights MUST be in Arabic\n- Use proper Arabic script and formatting\n- Write all text in Arabic, not English\n- Do NOT include any English text in your response\n\n"
-                print(f"✅ [process_image] Arabic language instruction added to prompt")
+                logger.debug("✅ [process_image] Arabic language instruction added to prompt")
             else:
-                print(f"ℹ️ [process_image] Using English (language: '{language}')")
+                logger.debug("ℹ️ [process_image] Using English (language: '%s')", language)
             
             # Create a comprehensive prompt for image text analysis
             prompt = f"""{language_instruction}Please analyze and summarize the following text extracted from an image:
@@ -1091,81 +1431,38 @@ Please provide:
 Make the analysis comprehensive and helpful."""
 
             # Use the selected LLM model for analysis with automatic fallback
-            print(f"🔍 [process_image] Calling call_llm with llm='{llm}'")
+            logger.debug("🔍 [process_image] Calling call_llm with llm='%s'", llm)
             logger.info(f"Calling LLM with model: {llm}")
             
-            try:
-                # Always generate in English first for better quality
-                answer = call_llm(prompt, llm, "english")
-            except Exception as e:
-                # If grok fails, automatically try llama as fallback
-                if llm == "grok":
-                    print(f"⚠️ [process_image] Grok failed, trying Llama as fallback...")
-                    logger.warning(f"Grok failed: {e}, falling back to Llama")
-                    try:
-                        answer = call_llm(prompt, "llama", "english")
-                        llm = "llama"  # Update llm to reflect what was actually used
-                        print(f"✅ [process_image] Successfully used Llama as fallback")
-                    except Exception as llama_error:
-                        # If llama also fails, try with different model
-                        print(f"⚠️ [process_image] Llama also failed, trying llama-3.1-8b-instant...")
-                        try:
-                            answer = call_llm(prompt, "chatgpt", "english")  # Uses llama-3.1-8b-instant
-                            llm = "chatgpt"
-                            print(f"✅ [process_image] Successfully used llama-3.1-8b-instant")
-                        except Exception as final_error:
-                            raise Exception(f"All LLM models failed. Grok: {str(e)}, Llama: {str(llama_error)}, Llama-3.1: {str(final_error)}")
-                else:
-                    # If not grok, just raise the original error
-                    raise
+            # Always generate in English first for better quality; llm is
+            # updated to reflect the model actually used
+            answer, llm = await _call_llm_with_fallback(prompt, (llm,) + DOCUMENT_LLM_FALLBACKS.get(llm, ()), "english")
             
             # If Arabic is requested, translate the English analysis to Arabic
-            print(f"🔍 [process_image] Checking if translation needed. Language value: '{language}', Type: {type(language)}, == 'arabic': {language == 'arabic'}")
-            if language == "arabic":
-                print(f"🌐 [process_image] ✓ Language is Arabic, translating analysis to Arabic...")
-                print(f"🌐 [process_image] Original answer length: {len(answer)} chars")
-                print(f"🌐 [process_image] Original answer preview: {answer[:200]}...")
+            if language == "arabic" and _is_mostly_arabic(answer):
+                logger.debug("✅ [process_image] Analysis generated directly in Arabic, skipping translation")
+            elif language == "arabic":
+                logger.debug("🌐 [process_image] Translating analysis to Arabic (%d chars)", len(answer))
                 try:
                     # Use checkpoint model for translation (with LLM fallback)
-                    if ARABIC_TRANSLATOR_AVAILABLE:
-                        print(f"🌐 [process_image] Using checkpoint model for translation (with LLM fallback)...")
-                        translated_answer = translate_to_arabic(answer, fallback_llm_func=call_llm)
-                    else:
-                        # Fallback to direct LLM translation
-                        print(f"🌐 [process_image] Checkpoint model not available, using LLM translation...")
-                        translation_prompt = f"""You are a professional translator. Your task is to translate the following English text to Arabic (العربية).
-
-⚠️ CRITICAL REQUIREMENTS:
-- You MUST translate the ENTIRE text to Arabic
-- Use proper Arabic script (العربية)
-- Maintain the exact same structure, sections, and formatting
-- Translate ALL text including section headers and labels
-- Do NOT leave any English words untranslated
-- The output must be 100% in Arabic
-
-English Text to Translate:
-{answer}
-
-Now provide the complete Arabic translation. Your response must be entirely in Arabic:"""
-                        translated_answer = call_llm(translation_prompt, llm, "english")
-                    
-                    print(f"🌐 [process_image] Translation response received, length: {len(translated_answer) if translated_answer else 0}")
+                    logger.debug("🌐 [process_image] Using checkpoint model for translation (with LLM fallback)...")
+                    translated_answer = await checkpoint_translator.translate(answer)
+                    if not translated_answer:
+                        logger.debug("🌐 [process_image] Checkpoint translation not available, using LLM translation...")
+                        translated_answer = await call_llm(answer, llm, "english", extra_system=ARABIC_TRANSLATION_INSTRUCTIONS)
                     
                     if translated_answer and len(translated_answer.strip()) > 0:
                         answer = translated_answer.strip()
-                        print(f"✅ [process_image] Successfully translated analysis to Arabic (length: {len(answer)} chars)")
-                        print(f"✅ [process_image] Translated answer preview: {answer[:200]}...")
+                        logger.debug("✅ [process_image] Translated analysis to Arabic (%d chars)", len(answer))
                     else:
-                        print(f"⚠️ [process_image] Translation returned empty, using original English")
+                        logger.warning("⚠️ [process_image] Translation returned empty, using original English")
                 except Exception as translate_error:
-                    print(f"❌ [process_image] Translation failed with error: {translate_error}")
-                    import traceback
-                    print(f"❌ [process_image] Translation error traceback: {traceback.format_exc()}")
+                    logger.exception("❌ [process_image] Translation failed with error: %s", translate_error)
                     # Continue with English version if translation fails
             
             query = f"Image text analysis using {llm.upper()} model"
 
-        audio_file = text_to_speech(answer, file_prefix="output_image")
+        audio_file = await asyncio.to_thread(text_to_speech, answer, file_prefix="output_image")
         audio_url = f"/api/stream/{os.path.basename(audio_file)}" if audio_file else "No audio generated"
 
         # Store to MongoDB
@@ -1178,7 +1475,7 @@ Now provide the complete Arabic translation. Your response must be entirely in A
             "audio_file": audio_url,
             "timestamp": datetime.now(timezone.utc)
         }
-        image_collection.insert_one(image_doc)
+        _write_in_background(image_collection.insert_one, image_doc)
 
         global image_response
         image_response = ImageResponse(
@@ -1210,168 +1507,222 @@ async def summarize_image():
         raise HTTPException(status_code=404, detail="No image has been processed yet.")
     return image_response
 
-@app.get("/api/stream/{filename}")
-async def stream_audio(filename: str):
+def _audio_file_response(filename: str) -> FileResponse:
+    """
+    Serve a generated MP3. The file is stat'ed once here and the result handed
+    to FileResponse, which would otherwise stat it again; Starlette answers
+    Range requests (seeking) from it.
+    """
     audio_path = os.path.join(TEMP_DIR, filename)
-
-    if not os.path.exists(audio_path):
+    try:
+        stat_result = os.stat(audio_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Audio file not found")
 
     return FileResponse(
         path=audio_path,
         media_type="audio/mpeg",
-        filename=filename
+        filename=filename,
+        stat_result=stat_result
     )
 
+@app.get("/api/stream/{filename}")
+async def stream_audio(filename: str):
+    return _audio_file_response(filename)
+
 @app.get("/api/audio/{filename}")
 async def download_audio(filename: str):
-    audio_path = os.path.join(TEMP_DIR, filename)
-
-    if not os.path.exists(audio_path):
-        raise HTTPException(status_code=404, detail="Audio file not found")
-
-    return FileResponse(
-        path=audio_path,
-        media_type="audio/mpeg",
-        filename=filename
-    )
+    return _audio_file_response(filename)
+
+# Content lines sent per SSE event (as consecutive data: lines); generators
+# hand control back to the event loop after each event
+SSE_LINES_PER_FRAME = 16
+# Longer answers are cut off with a notice rather than streamed in full
+STREAM_MAX_LINES = 5000
+
+# Frames are yielded as bytes so StreamingResponse sends them without re-encoding
+_SSE_BLANK = b"data: \n\n"
+_SSE_END = b"data: [END]\n\n"
+_SSE_ERROR = b"data: [ERROR]\n\n"
+
+def _sse_line(line: str) -> bytes:
+    return b"data: " + line.encode("utf-8") + b"\n\n"
+
+def _sse_lines(lines: List[str]) -> bytes:
+    return b"data: " + "\ndata: ".join(lines).encode("utf-8") + b"\n\n"
+
+def _ndjson_line(line: str) -> bytes:
+    return _json_bytes(line) + b"\n"
+
+def _ndjson_lines(lines: List[str]) -> bytes:
+    return b"\n".join(map(_json_bytes, lines)) + b"\n"
+
+class _StreamFraming(NamedTuple):
+    """How /process-pdf-stream and /process-img-stream encode their lines"""
+    media_type: str
+    line: Callable[[str], bytes]
+    lines: Callable[[List[str]], bytes]
+    blank: bytes
+    end: bytes
+    error: bytes
+
+# ?format=ndjson sends one JSON string per line, for clients that do not need
+# SSE framing
+_STREAM_FRAMINGS = {
+    "sse": _StreamFraming("text/event-stream", _sse_line, _sse_lines, _SSE_BLANK, _SSE_END, _SSE_ERROR),
+    "ndjson": _StreamFraming("application/x-ndjson", _ndjson_line, _ndjson_lines, b'""\n', b'"[END]"\n', b'"[ERROR]"\n'),
+}
+
+# Markdown emphasis/heading markers (**, *, ##, #) stripped from streamed answers
+_MD_STRIP = str.maketrans("", "", "*#")
+
+def _stream_lines(text: str) -> List[str]:
+    """Stripped lines of text, with each run of blank lines collapsed to one"""
+    lines = []
+    prev_blank = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped or not prev_blank:
+            lines.append(stripped)
+        prev_blank = not stripped
+    return lines
 
 @app.get("/process-pdf-stream")
 async def process_pdf_stream(
+    request: Request,
     file_path: str = None,
-    llm: str = "uniguru"
+    llm: str = "uniguru",
+    stream_format: Literal["sse", "ndjson"] = Query("sse", alias="format")
 ):
     """
     Stream PDF processing results line by line for live rendering
     """
+    framing = _STREAM_FRAMINGS[stream_format]
+
     async def generate_content():
         try:
-            yield f"data: 🔍 Starting document analysis...\n\n"
-            await asyncio.sleep(0.1)
+            yield framing.line("🔍 Starting document analysis...")
 
             # Get the latest PDF response
             if pdf_response is None:
-                yield f"data: ❌ No PDF has been processed yet. Please upload a document first.\n\n"
-                yield f"data: [ERROR]\n\n"
+                yield framing.line("❌ No PDF has been processed yet. Please upload a document first.")
+                yield framing.error
                 return
 
-            yield f"data: 📄 Processing: {pdf_response.title}\n\n"
-            await asyncio.sleep(0.2)
+            yield framing.line(f"📄 Processing: {pdf_response.title}")
 
-            yield f"data: 🤖 Using UNIGURU AI model\n\n"
-            await asyncio.sleep(0.2)
+            yield framing.line("🤖 Using UNIGURU AI model")
 
-            yield f"data: 📝 Generating comprehensive summary...\n\n"
-            await asyncio.sleep(0.3)
+            yield framing.line("📝 Generating comprehensive summary...")
 
             # Clean the answer content (remove markdown formatting)
             answer = pdf_response.answer
 
             # Remove markdown formatting
-            cleaned_answer = answer.replace('**', '').replace('*', '').replace('##', '').replace('#', '')
+            cleaned_answer = answer.translate(_MD_STRIP)
 
             # Split content into lines for streaming
-            content_lines = cleaned_answer.split('\n')
-
-            yield f"data: \n\n"
-            yield f"data: {pdf_response.title}\n\n"
-            yield f"data: \n\n"
-
-            # Stream content line by line
-            for i, line in enumerate(content_lines):
-                if line.strip():  # Only send non-empty lines
-                    yield f"data: {line.strip()}\n\n"
-                    await asyncio.sleep(0.05)  # Small delay for live rendering effect
-                else:
-                    yield f"data: \n\n"  # Send empty line
-                    await asyncio.sleep(0.02)
-
-            yield f"data: \n\n"
-            yield f"data: ✅ Document analysis complete!\n\n"
-            yield f"data: 🎵 Audio summary available for download\n\n"
-            yield f"data: [END]\n\n"
+            content_lines = _stream_lines(cleaned_answer)
+            truncated = len(content_lines) > STREAM_MAX_LINES
+            del content_lines[STREAM_MAX_LINES:]
+
+            yield framing.blank
+            yield framing.line(pdf_response.title)
+            yield framing.blank
+
+            # Stream content in batches of lines (empty lines are sent as empty lines)
+            for start in range(0, len(content_lines), SSE_LINES_PER_FRAME):
+                # Stop producing for clients that have gone away
+                if await request.is_disconnected():
+                    logger.debug("[process_pdf_stream] Client disconnected after %d of %d lines", start, len(content_lines))
+                    return
+                yield framing.lines(content_lines[start:start + SSE_LINES_PER_FRAME])
+                await asyncio.sleep(0)  # let other requests run on long documents
+            if truncated:
+                yield framing.line(f"… output truncated after {STREAM_MAX_LINES} lines")
+
+            yield framing.blank
+            yield framing.line("✅ Document analysis complete!")
+            yield framing.line("🎵 Audio summary available for download")
+            yield framing.end
 
         except Exception as e:
-            yield f"data: ❌ Error during streaming: {str(e)}\n\n"
-            yield f"data: [ERROR]\n\n"
+            yield framing.line(f"❌ Error during streaming: {str(e)}")
+            yield framing.error
 
     return StreamingResponse(
         generate_content(),
-        media_type="text/plain",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Content-Type": "text/plain; charset=utf-8"
-        }
+        media_type=framing.media_type,
+        headers=_STREAM_HEADERS
     )
 
 @app.get("/process-img-stream")
 async def process_image_stream(
+    request: Request,
     file_path: str = None,
-    llm: str = "uniguru"
+    llm: str = "uniguru",
+    stream_format: Literal["sse", "ndjson"] = Query("sse", alias="format")
 ):
     """
     Stream Image processing results line by line for live rendering
     """
+    framing = _STREAM_FRAMINGS[stream_format]
+
     async def generate_content():
         try:
-            yield f"data: 🔍 Starting image analysis...\n\n"
-            await asyncio.sleep(0.1)
+            yield framing.line("🔍 Starting image analysis...")
 
             # Get the latest image response
             if image_response is None:
-                yield f"data: ❌ No image has been processed yet. Please upload an image first.\n\n"
-                yield f"data: [ERROR]\n\n"
+                yield framing.line("❌ No image has been processed yet. Please upload an image first.")
+                yield framing.error
                 return
 
-            yield f"data: 🖼️ Processing image with OCR...\n\n"
-            await asyncio.sleep(0.2)
+            yield framing.line("🖼️ Processing image with OCR...")
 
-            yield f"data: 🤖 Using UNIGURU AI model\n\n"
-            await asyncio.sleep(0.2)
+            yield framing.line("🤖 Using UNIGURU AI model")
 
-            yield f"data: 📝 Generating comprehensive analysis...\n\n"
-            await asyncio.sleep(0.3)
+            yield framing.line("📝 Generating comprehensive analysis...")
 
             # Clean the answer content (remove markdown formatting)
             answer = image_response.answer
 
             # Remove markdown formatting
-            cleaned_answer = answer.replace('**', '').replace('*', '').replace('##', '').replace('#', '')
+            cleaned_answer = answer.translate(_MD_STRIP)
 
             # Split content into lines for streaming
-            content_lines = cleaned_answer.split('\n')
-
-            yield f"data: \n\n"
-            yield f"data: Image Analysis Results\n\n"
-            yield f"data: \n\n"
-
-            # Stream content line by line
-            for i, line in enumerate(content_lines):
-                if line.strip():  # Only send non-empty lines
-                    yield f"data: {line.strip()}\n\n"
-                    await asyncio.sleep(0.05)  # Small delay for live rendering effect
-                else:
-                    yield f"data: \n\n"  # Send empty line
-                    await asyncio.sleep(0.02)
-
-            yield f"data: \n\n"
-            yield f"data: ✅ Image analysis complete!\n\n"
-            yield f"data: 🎵 Audio summary available for download\n\n"
-            yield f"data: [END]\n\n"
+            content_lines = _stream_lines(cleaned_answer)
+            truncated = len(content_lines) > STREAM_MAX_LINES
+            del content_lines[STREAM_MAX_LINES:]
+
+            yield framing.blank
+            yield framing.line("Image Analysis Results")
+            yield framing.blank
+
+            # Stream content in batches of lines (empty lines are sent as empty lines)
+            for start in range(0, len(content_lines), SSE_LINES_PER_FRAME):
+                # Stop producing for clients that have gone away
+                if await request.is_disconnected():
+                    logger.debug("[process_image_stream] Client disconnected after %d of %d lines", start, len(content_lines))
+                    return
+                yield framing.lines(content_lines[start:start + SSE_LINES_PER_FRAME])
+                await asyncio.sleep(0)  # let other requests run on long documents
+            if truncated:
+                yield framing.line(f"… output truncated after {STREAM_MAX_LINES} lines")
+
+            yield framing.blank
+            yield framing.line("✅ Image analysis complete!")
+            yield framing.line("🎵 Audio summary available for download")
+            yield framing.end
 
         except Exception as e:
-            yield f"data: ❌ Error during streaming: {str(e)}\n\n"
-            yield f"data: [ERROR]\n\n"
+            yield framing.line(f"❌ Error during streaming: {str(e)}")
+            yield framing.error
 
     return StreamingResponse(
         generate_content(),
-        media_type="text/plain",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Content-Type": "text/plain; charset=utf-8"
-        }
+        media_type=framing.media_type,
+        headers=_STREAM_HEADERS
     )
 
 
@@ -1409,122 +1760,145 @@ class AgentResetRequest(BaseModel):
     class Config:
         populate_by_name = True  # Allow both field name and alias
 
+# Agent chat shares the Groq key with /chatbot and document summaries; cap how
+# many agent completions are in flight at once
+AGENT_LLM_CONCURRENCY = int(os.getenv("AGENT_LLM_CONCURRENCY", "8"))
+_agent_llm_slots = asyncio.Semaphore(AGENT_LLM_CONCURRENCY)
+
+# message_id/log_id of agent records only need to be unique, not random:
+# process id + start time, then a counter (no urandom read per id)
+_AGENT_ID_PREFIX = f"{os.getpid():x}-{int(time.time()):x}-"
+_agent_id_seq = count(1)
+
+def _agent_record_id() -> str:
+    return _AGENT_ID_PREFIX + str(next(_agent_id_seq))
+
+def _add_agent_record(store: defaultdict, record: dict) -> None:
+    store[record["user_id"]].append((next(_agent_record_seq), record))
+
+def _recent(mock: list, store: defaultdict, n: int, since: Optional[int] = None) -> Tuple[list, int]:
+    """
+    Last n of every user's records in insertion order, plus the cursor of the
+    newest one. Without ``since`` the mock entries lead the list; with it only
+    records added after that cursor are returned.
+    """
+    floor = since or 0
+    newest_first = list(islice(heapq.merge(
+        *(takewhile(lambda item: item[0] > floor, reversed(records)) for records in store.values()),
+        key=itemgetter(0), reverse=True,
+    ), n))
+    cursor = newest_first[0][0] if newest_first else floor
+    tail = [record for _, record in reversed(newest_first)]
+    return (tail if since is not None else (mock + tail)[-n:]), cursor
+
+def _record_count(store: defaultdict) -> int:
+    return sum(len(records) for records in store.values())
+
+async def _evict_idle_agent_simulations():
+    while True:
+        await asyncio.sleep(300)
+        cutoff = time.monotonic() - AGENT_SIMULATION_TTL
+        for user_id in [uid for uid, sim in agent_simulations.items() if sim.get("last_active", 0) < cutoff]:
+            del agent_simulations[user_id]
+
+@app.on_event("startup")
+async def _start_agent_simulation_eviction():
+    app.state.agent_simulation_evictor = asyncio.create_task(_evict_idle_agent_simulations())
+
 @app.get("/get_agent_output")
-async def get_agent_output():
+async def get_agent_output(since: Optional[int] = Query(None, description="next_cursor of the previous poll; only newer outputs are returned")):
     """Get agent outputs for the simulation"""
     try:
+        now_ts = datetime.now().isoformat()
         # Return mock agent outputs with data processing content
         mock_outputs = [
             {
                 "agent_id": "data_processor",
                 "message": "Welcome to the data processing simulation! I can help you process documents and analyze content.",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_ts,
                 "type": "welcome",
                 "status": "active"
             },
             {
                 "agent_id": "document_analyzer",
                 "message": "I'm here to help with document analysis and content extraction.",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_ts,
                 "type": "introduction",
                 "status": "idle"
             }
         ]
         
-        # Add any stored agent outputs
-        all_outputs = mock_outputs + agent_outputs
-        
-        return {
+        outputs, next_cursor = _recent(mock_outputs, agent_outputs, 10, since)  # Return last 10 outputs
+        return _json_response({
             "status": "success",
-            "outputs": all_outputs[-10:],  # Return last 10 outputs
-            "count": len(all_outputs),
-            "timestamp": datetime.now().isoformat()
-        }
+            "outputs": outputs,
+            "next_cursor": next_cursor,
+            "count": len(mock_outputs) + _record_count(agent_outputs),
+            "timestamp": now_ts
+        })
         
     except Exception as e:
         logger.error(f"Error getting agent output: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/agent_logs")
-async def get_agent_logs():
+async def get_agent_logs(since: Optional[int] = Query(None, description="next_cursor of the previous poll; only newer logs are returned")):
     """Get agent logs for monitoring"""
     try:
+        now_ts = datetime.now().isoformat()
         # Mock agent logs
         mock_agent_logs = [
             {
-                "log_id": str(uuid4()),
+                "log_id": _agent_record_id(),
                 "agent_id": "data_processor",
                 "level": "INFO",
                 "message": "Data processing agent initialized successfully",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_ts,
                 "user_id": "system"
             },
             {
-                "log_id": str(uuid4()),
+                "log_id": _agent_record_id(),
                 "agent_id": "document_analyzer",
                 "level": "INFO",
                 "message": "Document analyzer ready for processing",
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": now_ts,
                 "user_id": "system"
             }
         ]
         
-        # Combine with stored logs
-        all_logs = mock_agent_logs + agent_logs
-        
-        return {
+        logs, next_cursor = _recent(mock_agent_logs, agent_logs, 20, since)  # Return last 20 logs
+        return _json_response({
             "status": "success",
-            "logs": all_logs[-20:],  # Return last 20 logs
-            "count": len(all_logs),
-            "timestamp": datetime.now().isoformat()
-        }
+            "logs": logs,
+            "next_cursor": next_cursor,
+            "count": len(mock_agent_logs) + _record_count(agent_logs),
+            "timestamp": now_ts
+        })
         
     except Exception as e:
         logger.error(f"Error getting agent logs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/agent_message")
-async def send_agent_message(request: AgentMessageRequest):
-    """Send a message to an agent and get AI-powered response"""
-    try:
-        timestamp = request.timestamp or datetime.now().isoformat()
-        
-        # Store the message
-        message_record = {
-            "message_id": str(uuid4()),
-            "agent_id": request.agent_id,
-            "user_id": request.user_id,
-            "message": request.message,
-            "timestamp": timestamp,
-            "type": "user_message"
-        }
-        
-        agent_outputs.append(message_record)
-        
-        # Map agent_id to agent type
-        # Frontend sends: 1=education, 2=financial, 3=wellness, or string IDs
-        agent_type_map = {
-            "1": "education",
-            "2": "financial", 
-            "3": "wellness",
-            "education": "education",
-            "financial": "financial",
-            "wellness": "wellness",
-            "data_processor": "education",  # Legacy support
-            "document_analyzer": "education"  # Legacy support
-        }
-        
-        agent_type = agent_type_map.get(str(request.agent_id), "education")
-        
-        # Get simulation context if available
-        simulation_context = agent_simulations.get(request.user_id, {})
-        financial_profile = simulation_context.get("financial_profile", {})
-        edu_mentor_profile = simulation_context.get("edu_mentor_profile", {})
-        wellness_profile = simulation_context.get("wellness_profile", {})
-        
-        # Create agent-specific prompts
-        system_prompts = {
-            "education": """You are EduMentor, an expert educational AI assistant specialized in teaching and learning. 
+# agent_id -> agent type
+# Frontend sends: 1=education, 2=financial, 3=wellness, or string IDs; int
+# keys cover numeric agent ids so the lookup needs no str() conversion
+AGENT_TYPE_MAP = {
+    1: "education",
+    2: "financial",
+    3: "wellness",
+    "1": "education",
+    "2": "financial", 
+    "3": "wellness",
+    "education": "education",
+    "financial": "financial",
+    "wellness": "wellness",
+    "data_processor": "education",  # Legacy support
+    "document_analyzer": "education"  # Legacy support
+}
+
+# Agent-specific system prompts
+AGENT_SYSTEM_PROMPTS = {
+    "education": """You are EduMentor, an expert educational AI assistant specialized in teaching and learning. 
 Your role is to:
 - Explain concepts clearly and comprehensively
 - Break down complex topics into understandable parts
@@ -1534,8 +1908,8 @@ Your role is to:
 - Help students understand difficult concepts
 
 Be friendly, encouraging, and pedagogically sound. Use examples and analogies when helpful.""",
-            
-            "financial": """You are FinancialCrew, an expert financial advisor AI assistant specialized in financial planning and analysis.
+
+    "financial": """You are FinancialCrew, an expert financial advisor AI assistant specialized in financial planning and analysis.
 Your role is to:
 - Provide sound financial advice and analysis
 - Help with budgeting, investments, and financial planning
@@ -1545,8 +1919,8 @@ Your role is to:
 - Discuss risk management and financial goals
 
 Be professional, data-driven, and focused on helping users make informed financial decisions.""",
-            
-            "wellness": """You are WellnessBot, a compassionate wellness AI assistant focused on mental and physical wellbeing.
+
+    "wellness": """You are WellnessBot, a compassionate wellness AI assistant focused on mental and physical wellbeing.
 Your role is to:
 - Provide holistic wellness advice
 - Support mental health and emotional wellbeing
@@ -1556,8 +1930,44 @@ Your role is to:
 - Be empathetic and understanding
 
 Be warm, supportive, and evidence-based. Focus on overall wellbeing and balance."""
+}
+
+# Template replies used when the LLM call fails; only the selected one is formatted
+AGENT_FALLBACK_TEMPLATES = {
+    "education": "I understand you're asking about: {message}. As EduMentor, I can help explain this concept and provide learning resources. Could you provide more details about what specific aspect you'd like to understand?",
+    "financial": "Regarding your financial question about: {message}. As FinancialCrew, I can help analyze this and provide financial guidance. Could you share more context about your financial situation or goals?",
+    "wellness": "I hear you're asking about: {message}. As WellnessBot, I'm here to support your wellbeing. Could you tell me more about what you're experiencing or what kind of support you're looking for?"
+}
+AGENT_DEFAULT_FALLBACK = "Thank you for your message: {message}. I'm here to help!"
+
+@app.post("/agent_message")
+async def send_agent_message(request: AgentMessageRequest):
+    """Send a message to an agent and get AI-powered response"""
+    try:
+        timestamp = request.timestamp or datetime.now().isoformat()
+        
+        # Store the message
+        message_record = {
+            "message_id": _agent_record_id(),
+            "agent_id": request.agent_id,
+            "user_id": request.user_id,
+            "message": request.message,
+            "timestamp": timestamp,
+            "type": "user_message"
         }
         
+        _add_agent_record(agent_outputs, message_record)
+        
+        agent_type = AGENT_TYPE_MAP.get(request.agent_id, "education")
+        
+        # Get simulation context if available
+        simulation_context = agent_simulations.get(request.user_id, {})
+        if simulation_context:
+            simulation_context["last_active"] = time.monotonic()
+        financial_profile = simulation_context.get("financial_profile", {})
+        edu_mentor_profile = simulation_context.get("edu_mentor_profile", {})
+        wellness_profile = simulation_context.get("wellness_profile", {})
+        
         # Build context-aware prompt
         user_message = request.message.strip()
         
@@ -1572,34 +1982,37 @@ Be warm, supportive, and evidence-based. Focus on overall wellbeing and balance.
         if agent_type == "financial" and financial_profile:
             name = financial_profile.get("name", "")
             goal = financial_profile.get("financialGoal", "")
-            if name or goal:
-                context_info = f"\n\nContext: User's financial profile - "
-                if name:
-                    context_info += f"Name: {name}. "
-                if goal:
-                    context_info += f"Financial Goal: {goal}. "
+            parts = []
+            if name:
+                parts.append(f"Name: {name}. ")
+            if goal:
+                parts.append(f"Financial Goal: {goal}. ")
+            if parts:
+                context_info = "\n\nContext: User's financial profile - " + "".join(parts)
         
         if agent_type == "wellness" and wellness_profile:
             wellness_type = wellness_profile.get("wellnessType", "")
             mood_score = wellness_profile.get("moodScore")
             stress_level = wellness_profile.get("stressLevel")
-            if wellness_type or mood_score is not None or stress_level is not None:
-                context_info = f"\n\nContext: User's wellness profile - "
-                if wellness_type:
-                    context_info += f"Wellness Type: {wellness_type}. "
-                if mood_score is not None:
-                    context_info += f"Current Mood Score: {mood_score}/10. "
-                if stress_level is not None:
-                    context_info += f"Current Stress Level: {stress_level}/6. "
+            parts = []
+            if wellness_type:
+                parts.append(f"Wellness Type: {wellness_type}. ")
+            if mood_score is not None:
+                parts.append(f"Current Mood Score: {mood_score}/10. ")
+            if stress_level is not None:
+                parts.append(f"Current Stress Level: {stress_level}/6. ")
+            if parts:
+                context_info = "\n\nContext: User's wellness profile - " + "".join(parts)
         
         # Create the full prompt
-        system_prompt = system_prompts.get(agent_type, system_prompts["education"])
+        system_prompt = AGENT_SYSTEM_PROMPTS.get(agent_type, AGENT_SYSTEM_PROMPTS["education"])
         full_prompt = f"{system_prompt}{context_info}\n\nUser's message: {user_message}\n\nProvide a helpful, relevant response:"
         
         # Generate AI response
         try:
             logger.info(f"🤖 Generating AI response for agent type: {agent_type}")
-            response_message = call_llm(full_prompt, llm="grok")
+            async with _agent_llm_slots:
+                response_message = await call_llm(full_prompt, llm="grok")
             
             if not response_message or len(response_message.strip()) == 0:
                 raise Exception("Empty response from AI")
@@ -1609,46 +2022,42 @@ Be warm, supportive, and evidence-based. Focus on overall wellbeing and balance.
         except Exception as ai_error:
             logger.warning(f"⚠️ AI generation failed: {ai_error}, using fallback response")
             # Fallback to template responses if AI fails
-            fallback_responses = {
-                "education": f"I understand you're asking about: {user_message}. As EduMentor, I can help explain this concept and provide learning resources. Could you provide more details about what specific aspect you'd like to understand?",
-                "financial": f"Regarding your financial question about: {user_message}. As FinancialCrew, I can help analyze this and provide financial guidance. Could you share more context about your financial situation or goals?",
-                "wellness": f"I hear you're asking about: {user_message}. As WellnessBot, I'm here to support your wellbeing. Could you tell me more about what you're experiencing or what kind of support you're looking for?"
-            }
-            response_message = fallback_responses.get(agent_type, f"Thank you for your message: {user_message}. I'm here to help!")
+            response_message = AGENT_FALLBACK_TEMPLATES.get(agent_type, AGENT_DEFAULT_FALLBACK).format(message=user_message)
         
         # Store agent response
+        responded_at = datetime.now().isoformat()
         response_record = {
-            "message_id": str(uuid4()),
+            "message_id": _agent_record_id(),
             "agent_id": request.agent_id,
             "user_id": request.user_id,
             "message": response_message,
             "content": response_message,  # Frontend expects 'content' field
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": responded_at,
             "type": "agent_response",
             "confidence": 0.85
         }
         
-        agent_outputs.append(response_record)
+        _add_agent_record(agent_outputs, response_record)
         
         # Log the interaction
         agent_log = {
-            "log_id": str(uuid4()),
+            "log_id": _agent_record_id(),
             "agent_id": request.agent_id,
             "level": "INFO",
             "message": f"Processed AI message from user {request.user_id} (agent_type: {agent_type})",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": responded_at,
             "user_id": request.user_id
         }
-        agent_logs.append(agent_log)
+        _add_agent_record(agent_logs, agent_log)
         
-        return {
+        return _json_response({
             "status": "success",
             "message": "Message sent to agent successfully",
             "agent_response": response_record,
             "content": response_message,  # Frontend expects this
             "confidence": 0.85,
             "timestamp": timestamp
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error sending agent message: {e}")
@@ -1665,7 +2074,8 @@ async def start_agent_simulation(request: AgentSimulationRequest):
             "agent_id": request.agent_id,
             "status": "active",
             "started_at": timestamp,
-            "user_id": request.user_id
+            "user_id": request.user_id,
+            "last_active": time.monotonic()
         }
         
         # Include additional profile data if provided
@@ -1692,34 +2102,34 @@ async def start_agent_simulation(request: AgentSimulationRequest):
         context_msg = f" with {', '.join(context_info)}" if context_info else ""
         
         agent_log = {
-            "log_id": str(uuid4()),
+            "log_id": _agent_record_id(),
             "agent_id": request.agent_id,
             "level": "INFO",
             "message": f"Agent simulation started for user {request.user_id}{context_msg}",
             "timestamp": timestamp,
             "user_id": request.user_id
         }
-        agent_logs.append(agent_log)
+        _add_agent_record(agent_logs, agent_log)
         
         # Add welcome message to outputs
         welcome_message = {
-            "message_id": str(uuid4()),
+            "message_id": _agent_record_id(),
             "agent_id": request.agent_id,
             "user_id": request.user_id,
             "message": f"Agent simulation started! Agent {request.agent_id} is now active and ready to assist with data processing{context_msg}.",
             "timestamp": timestamp,
             "type": "simulation_start"
         }
-        agent_outputs.append(welcome_message)
+        _add_agent_record(agent_outputs, welcome_message)
         
-        return {
+        return _json_response({
             "status": "success",
             "message": f"Agent simulation started for {request.agent_id}",
             "agent_id": request.agent_id,
             "user_id": request.user_id,
             "timestamp": timestamp,
             "additional_context": context_info
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error starting agent simulation: {e}")
@@ -1737,28 +2147,27 @@ async def stop_agent_simulation(request: AgentSimulationRequest):
             agent_simulations[request.user_id]["stopped_at"] = timestamp
             
             # Clear old logs for this user
-            for log in agent_logs:
-                if log.get("user_id") == request.user_id:
-                    log["status"] = "stopped"
+            for _, log in agent_logs.get(request.user_id, ()):
+                log["status"] = "stopped"
         
         # Log simulation stop
         agent_log = {
-            "log_id": str(uuid4()),
+            "log_id": _agent_record_id(),
             "agent_id": request.agent_id,
             "level": "INFO",
             "message": f"Agent simulation stopped for user {request.user_id}",
             "timestamp": timestamp,
             "user_id": request.user_id
         }
-        agent_logs.append(agent_log)
+        _add_agent_record(agent_logs, agent_log)
         
-        return {
+        return _json_response({
             "status": "success",
             "message": f"Agent simulation stopped for {request.agent_id}",
             "agent_id": request.agent_id,
             "user_id": request.user_id,
             "timestamp": timestamp
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error stopping agent simulation: {e}")
@@ -1775,27 +2184,26 @@ async def reset_agent_simulation(request: AgentResetRequest):
             del agent_simulations[request.user_id]
         
         # Clear user-specific logs and outputs
-        global agent_logs, agent_outputs
-        agent_logs = [log for log in agent_logs if log.get("user_id") != request.user_id]
-        agent_outputs = [output for output in agent_outputs if output.get("user_id") != request.user_id]
+        agent_logs.pop(request.user_id, None)
+        agent_outputs.pop(request.user_id, None)
         
         # Log reset
         reset_log = {
-            "log_id": str(uuid4()),
+            "log_id": _agent_record_id(),
             "agent_id": "system",
             "level": "INFO",
             "message": f"Agent simulation reset for user {request.user_id}",
             "timestamp": timestamp,
             "user_id": request.user_id
         }
-        agent_logs.append(reset_log)
+        _add_agent_record(agent_logs, reset_log)
         
-        return {
+        return _json_response({
             "status": "success",
             "message": f"Agent simulation reset for user {request.user_id}",
             "user_id": request.user_id,
             "timestamp": timestamp
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error resetting agent simulation: {e}")
@@ -1806,7 +2214,10 @@ if __name__ == "__main__":
     try:
         # Use port 8011 to avoid conflict with chatbot service on port 8001
         port = int(os.getenv("API_DATA_PORT", "8011"))
-        uvicorn.run(app, host="0.0.0.0", port=port)
+        # loop/http "auto" pick uvloop and httptools when uvicorn[standard] is
+        # installed. One worker only: the last PDF/image result, agent state and
+        # the unanswered-query queue live in process memory.
+        uvicorn.run(app, host="0.0.0.0", port=port, timeout_keep_alive=75, backlog=2048)
     except Exception as e:
         logger.error(f"Failed to start server: {e}")
         raise
@@ -8,7 +8,7 @@ import os
 import sys
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +34,102 @@ except Exception as e:
     _model_available = False
 
 
+_model_load_failed = False
+
+
+def _get_loaded_model(checkpoint_path: Optional[str] = None):
+    """
+    Return the shared checkpoint model, loading it on first use.
+
+    The model is loaded once per process and reused by every call; a failed
+    load is remembered so later requests don't retry it.
+    """
+    global _local_model, _model_load_failed
+    if not _model_available or _model_load_failed:
+        return None
+
+    if _local_model is None:
+        logger.info("Initializing Arabic checkpoint model for translation...")
+        _local_model = get_local_model(checkpoint_path)
+
+    if not _local_model.is_loaded():
+        logger.info("Loading Arabic checkpoint model...")
+        try:
+            _local_model.ensure_loaded()
+        except Exception as e:
+            logger.error(f"Failed to load checkpoint model, disabling checkpoint translation: {e}")
+            _model_load_failed = True
+            return None
+
+    if not _local_model.is_loaded():
+        # Another thread is still loading it
+        logger.warning("Failed to load checkpoint model")
+        return None
+    return _local_model
+
+
+def warm_up_checkpoint_model() -> bool:
+    """Load the checkpoint model ahead of the first translation request"""
+    return _get_loaded_model() is not None
+
+
+_TRANSLATION_PREFIXES = (
+    "Arabic translation:",
+    "الترجمة:",
+    "Translation:",
+    "الترجمة العربية:",
+    "Arabic:",
+    "عربي:"
+)
+
+
+# Translation prompts are fixed text around the input; the halves are built
+# once so each call is a single concatenation
+_CHECKPOINT_PROMPT_PREFIX = """Translate the following English text to Arabic. 
+Provide only the Arabic translation without any additional text, explanations, or English words.
+
+English text:
+"""
+_CHECKPOINT_PROMPT_SUFFIX = """
+
+Arabic translation:"""
+
+_LLM_PROMPT_PREFIX = """You are a professional translator. Your task is to translate the following English text to Arabic (العربية).
+
+⚠️ CRITICAL REQUIREMENTS:
+- You MUST translate the ENTIRE text to Arabic
+- Use proper Arabic script (العربية)
+- Maintain the exact same structure, sections, and formatting
+- Translate ALL text including section headers
+- Do NOT leave any English words untranslated
+- The output must be 100% in Arabic
+
+English Text to Translate:
+"""
+_LLM_PROMPT_SUFFIX = """
+
+Now provide the complete Arabic translation. Your response must be entirely in Arabic:"""
+
+
+def _checkpoint_prompt(text: str) -> str:
+    return _CHECKPOINT_PROMPT_PREFIX + text + _CHECKPOINT_PROMPT_SUFFIX
+
+
+def _clean_translation(arabic_translation: Optional[str]) -> Optional[str]:
+    """Strip the output and any label prefixes; None if nothing is left"""
+    if not arabic_translation or len(arabic_translation.strip()) == 0:
+        logger.warning("Checkpoint model returned empty translation")
+        return None
+    
+    arabic_translation = arabic_translation.strip()
+    
+    # Remove common prefixes that might be added
+    for prefix in _TRANSLATION_PREFIXES:
+        if arabic_translation.startswith(prefix):
+            arabic_translation = arabic_translation[len(prefix):].strip()
+    return arabic_translation
+
+
 def translate_to_arabic_with_checkpoint(text: str, checkpoint_path: Optional[str] = None) -> Optional[str]:
     """
     Translate English text to Arabic using the checkpoint model
@@ -45,76 +141,61 @@ def translate_to_arabic_with_checkpoint(text: str, checkpoint_path: Optional[str
     Returns:
         Arabic translation or None if translation fails
     """
-    if not _model_available:
-        logger.debug("Checkpoint model not available, skipping checkpoint translation")
-        return None
-    
     try:
-        global _local_model
-        
-        # Get or initialize the local model
-        if _local_model is None:
-            logger.info("Initializing Arabic checkpoint model for translation...")
-            _local_model = get_local_model(checkpoint_path)
-        
-        # Ensure model is loaded
-        if not _local_model.is_loaded():
-            logger.info("Loading Arabic checkpoint model...")
-            _local_model.ensure_loaded()
-        
-        if not _local_model.is_loaded():
-            logger.warning("Failed to load checkpoint model")
+        model = _get_loaded_model(checkpoint_path)
+        if model is None:
+            logger.debug("Checkpoint model not available, skipping checkpoint translation")
             return None
         
-        # Create translation prompt
-        translation_prompt = f"""Translate the following English text to Arabic. 
-Provide only the Arabic translation without any additional text, explanations, or English words.
-
-English text:
-{text}
-
-Arabic translation:"""
-        
         logger.info(f"Translating text using checkpoint model (length: {len(text)} chars)")
         
         # Generate Arabic translation
-        arabic_translation = _local_model.generate(
-            prompt=translation_prompt,
+        arabic_translation = _clean_translation(model.generate(
+            prompt=_checkpoint_prompt(text),
             max_new_tokens=512,
             temperature=0.7,
             top_p=0.9
-        )
-        
-        if not arabic_translation or len(arabic_translation.strip()) == 0:
-            logger.warning("Checkpoint model returned empty translation")
-            return None
-        
-        # Clean up the response
-        arabic_translation = arabic_translation.strip()
-        
-        # Remove common prefixes that might be added
-        prefixes_to_remove = [
-            "Arabic translation:",
-            "الترجمة:",
-            "Translation:",
-            "الترجمة العربية:",
-            "Arabic:",
-            "عربي:"
-        ]
-        for prefix in prefixes_to_remove:
-            if arabic_translation.startswith(prefix):
-                arabic_translation = arabic_translation[len(prefix):].strip()
+        ))
         
-        logger.info(f"✅ Successfully translated using checkpoint model (output length: {len(arabic_translation)} chars)")
+        if arabic_translation:
+            logger.info(f"✅ Successfully translated using checkpoint model (output length: {len(arabic_translation)} chars)")
         return arabic_translation
         
     except Exception as e:
         logger.error(f"Error translating with checkpoint model: {e}")
-        import traceback
-        logger.debug(traceback.format_exc())
+        logger.debug("Checkpoint translation traceback", exc_info=True)
         return None
 
 
+def translate_many_with_checkpoint(texts: List[str]) -> List[Optional[str]]:
+    """
+    Translate several English texts in one batched forward pass
+    
+    Args:
+        texts: English texts to translate
+        
+    Returns:
+        Arabic translations in input order (None where translation failed)
+    """
+    try:
+        model = _get_loaded_model()
+        if model is None:
+            return [None] * len(texts)
+        
+        logger.info(f"Translating {len(texts)} texts using checkpoint model in one batch")
+        outputs = model.generate_batch(
+            [_checkpoint_prompt(text) for text in texts],
+            max_new_tokens=512,
+            temperature=0.7,
+            top_p=0.9
+        )
+        return [_clean_translation(output) for output in outputs]
+        
+    except Exception as e:
+        logger.error(f"Error batch-translating with checkpoint model: {e}")
+        return [None] * len(texts)
+
+
 def translate_to_arabic(text: str, fallback_llm_func=None, checkpoint_path: Optional[str] = None) -> str:
     """
     Translate English text to Arabic using checkpoint model with LLM fallback
@@ -139,21 +220,7 @@ def translate_to_arabic(text: str, fallback_llm_func=None, checkpoint_path: Opti
     if fallback_llm_func:
         logger.info("⚠️ Checkpoint model unavailable, using LLM fallback for translation")
         try:
-            translation_prompt = f"""You are a professional translator. Your task is to translate the following English text to Arabic (العربية).
-
-⚠️ CRITICAL REQUIREMENTS:
-- You MUST translate the ENTIRE text to Arabic
-- Use proper Arabic script (العربية)
-- Maintain the exact same structure, sections, and formatting
-- Translate ALL text including section headers
-- Do NOT leave any English words untranslated
-- The output must be 100% in Arabic
-
-English Text to Translate:
-{text}
-
-Now provide the complete Arabic translation. Your response must be entirely in Arabic:"""
-            
+            translation_prompt = _LLM_PROMPT_PREFIX + text + _LLM_PROMPT_SUFFIX
             translated_text = fallback_llm_func(translation_prompt, "grok", "english")
             
             if translated_text and len(translated_text.strip()) > 0:
@@ -171,6 +238,6 @@ Now provide the complete Arabic translation. Your response must be entirely in A
 
 def is_checkpoint_available() -> bool:
     """Check if checkpoint model is available"""
-    return _model_available
+    return _model_available and not _model_load_failed
 
 
@@ -16,8 +16,17 @@ MONGO_URI = (
 # Print the MongoDB URI being used (for debugging)
 print(f"Connecting to MongoDB with URI: {MONGO_URI}")
 
-# Connect to MongoDB
-client = MongoClient(MONGO_URI)
+# Connect to MongoDB. The pool is sized for the concurrent /chatbot,
+# /process-pdf and /process-img handlers (plus their background writes);
+# idle connections are recycled after 5 minutes.
+client = MongoClient(
+    MONGO_URI,
+    maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "200")),
+    minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", "10")),
+    maxIdleTimeMS=int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+    waitQueueTimeoutMS=int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000")),
+    retryWrites=True,
+)
 
 # Test the connection
 try:
@@ -5,6 +5,8 @@ Supports: Groq, OpenAI, and local fallback responses
 
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional, Dict, Any
 from dotenv import load_dotenv
 import logging
@@ -16,6 +18,19 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _pooled_session() -> requests.Session:
+    """Keep-alive session with a separate connection pool for Groq and other hosts"""
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504], allowed_methods=None)
+    session.mount("https://api.groq.com", HTTPAdapter(pool_connections=32, pool_maxsize=128, max_retries=retry))
+    session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=128, max_retries=retry))
+    return session
+
+
+# Shared across calls so each request reuses an open TCP/TLS connection
+_SESSION = _pooled_session()
+
 class LLMService:
     """Enhanced LLM service with multiple providers and fallback"""
     
@@ -64,7 +79,7 @@ class LLMService:
 
         try:
             logger.info(f"Calling UniGuru API with model: {model}")
-            response = requests.post(
+            response = _SESSION.post(
                 api_url,
                 headers=headers,
                 json=payload,
@@ -128,7 +143,7 @@ class LLMService:
         
         try:
             logger.info(f"Calling OpenAI API with model: {model}")
-            response = requests.post(
+            response = _SESSION.post(
                 "https://api.openai.com/v1/chat/completions",
                 headers=headers,
                 json=payload,
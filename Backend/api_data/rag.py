@@ -3,6 +3,7 @@ from typing import List, Optional
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 from fastapi.responses import FileResponse
 import os
@@ -103,6 +104,10 @@ class ImageResponse(BaseModel):
 pdf_response: PDFResponse | None = None
 image_response: ImageResponse| None = None
 
+# Keep-alive pool for Groq calls instead of a new TCP/TLS handshake per request
+_GROQ_SESSION = requests.Session()
+_GROQ_SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=128))
+
 class SimpleGroqLLM(LLM):
     groq_api_key: str
     model: str = "llama-3.1-8b-instant"
@@ -117,7 +122,7 @@ class SimpleGroqLLM(LLM):
             "messages": [{"role": "user", "content": prompt}],
         }
 
-        response = requests.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=payload)
+        response = _GROQ_SESSION.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=payload)
 
         try:
             result = response.json()
@@ -0,0 +1,171 @@
+"""
+Semantic response cache for LLM calls.
+
+Completed (prompt, llm, language) -> response pairs are kept in memory and
+mirrored to MongoDB as ``type: "llm_cache"`` documents so a restarted worker
+starts warm. A new prompt is served from the cache when it is identical to a
+cached one or, for chat-sized prompts, when its embedding is close enough
+(cosine similarity >= threshold) to a cached prompt for the same llm/language.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    from langchain_huggingface import HuggingFaceEmbeddings
+    EMBEDDINGS_AVAILABLE = True
+except ImportError:
+    EMBEDDINGS_AVAILABLE = False
+    logger.warning("langchain_huggingface not available; LLM cache will only serve exact matches")
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+CACHE_DOC_TYPE = "llm_cache"
+
+
+class CacheLookup(NamedTuple):
+    response: Optional[str]
+    embedding: Optional[np.ndarray]
+
+
+class SemanticCache:
+    """
+    In-memory exact + embedding cache for LLM completions.
+
+    Vectors are L2-normalised and stored per (llm, language) in a dense
+    matrix, so a lookup is one matrix-vector product (inner product ==
+    cosine similarity). Prompts longer than ``max_semantic_chars`` (document
+    summaries, translations) only ever match exactly: their embeddings are
+    dominated by the shared prompt template and would collide.
+    """
+
+    def __init__(self, collection=None, threshold: float = 0.92,
+                 max_entries: int = 2048, max_semantic_chars: int = 1000):
+        self.collection = collection
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_semantic_chars = max_semantic_chars
+        self._lock = threading.Lock()
+        self._exact = OrderedDict()
+        self._vectors = {}
+        self._responses = {}
+        self._embedder = None
+        self._embedder_failed = not EMBEDDINGS_AVAILABLE
+
+    @staticmethod
+    def _key(prompt: str, llm: str, language: str) -> str:
+        return hashlib.blake2b(f"{llm}\x00{language}\x00{prompt}".encode("utf-8"), digest_size=20).hexdigest()
+
+    def _embed(self, prompt: str) -> Optional[np.ndarray]:
+        if self._embedder_failed or len(prompt) > self.max_semantic_chars:
+            return None
+        try:
+            if self._embedder is None:
+                self._embedder = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+            vector = np.asarray(self._embedder.embed_query(prompt), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Disabling semantic LLM cache, embedding failed: {e}")
+            self._embedder_failed = True
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def lookup(self, prompt: str, llm: str, language: str) -> CacheLookup:
+        """Return the cached response (or None) plus the prompt embedding for a later insert."""
+        key = self._key(prompt, llm, language)
+        with self._lock:
+            if key in self._exact:
+                self._exact.move_to_end(key)
+                return CacheLookup(self._exact[key], None)
+
+        embedding = self._embed(prompt)
+        if embedding is None:
+            return CacheLookup(None, None)
+
+        with self._lock:
+            matrix = self._vectors.get((llm, language))
+            if matrix is not None and len(matrix):
+                scores = matrix @ embedding
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    logger.info(f"LLM cache hit ({llm}/{language}, similarity {scores[best]:.3f})")
+                    return CacheLookup(self._responses[(llm, language)][best], embedding)
+        return CacheLookup(None, embedding)
+
+    def _remember(self, key: str, llm: str, language: str, response: str,
+                  embedding: Optional[np.ndarray]) -> None:
+        with self._lock:
+            self._exact[key] = response
+            self._exact.move_to_end(key)
+            while len(self._exact) > self.max_entries:
+                self._exact.popitem(last=False)
+
+            if embedding is None:
+                return
+            bucket = (llm, language)
+            matrix = self._vectors.get(bucket)
+            responses = self._responses.setdefault(bucket, [])
+            matrix = embedding[None, :] if matrix is None else np.vstack((matrix, embedding))
+            responses.append(response)
+            if len(responses) > self.max_entries:
+                matrix = matrix[-self.max_entries:]
+                del responses[:-self.max_entries]
+            self._vectors[bucket] = matrix
+
+    def insert(self, prompt: str, llm: str, language: str, response: str,
+               embedding: Optional[np.ndarray] = None) -> None:
+        """Cache a completed response and persist it for warm restarts."""
+        if not response:
+            return
+        if embedding is None:
+            embedding = self._embed(prompt)
+        key = self._key(prompt, llm, language)
+        self._remember(key, llm, language, response, embedding)
+
+        if self.collection is None:
+            return
+        try:
+            self.collection.insert_one({
+                "type": CACHE_DOC_TYPE,
+                "key": key,
+                "prompt": prompt,
+                "llm": llm,
+                "language": language,
+                "response": response,
+                "embedding": embedding.tolist() if embedding is not None else None,
+                "timestamp": datetime.now(timezone.utc),
+            })
+        except Exception as e:
+            logger.warning(f"Failed to persist LLM cache entry: {e}")
+
+    def load(self) -> int:
+        """Warm the in-memory cache from the most recent persisted entries."""
+        if self.collection is None:
+            return 0
+        try:
+            docs = list(
+                self.collection.find({"type": CACHE_DOC_TYPE})
+                .sort("timestamp", -1)
+                .limit(self.max_entries)
+            )
+        except Exception as e:
+            logger.warning(f"Failed to load LLM cache: {e}")
+            return 0
+
+        for doc in reversed(docs):
+            embedding = doc.get("embedding")
+            if embedding is not None:
+                embedding = np.asarray(embedding, dtype=np.float32)
+            # Recomputed rather than read back, so entries written under an
+            # older key scheme still match
+            key = self._key(doc["prompt"], doc["llm"], doc["language"])
+            self._remember(key, doc["llm"], doc["language"], doc["response"], embedding)
+        logger.info(f"Loaded {len(docs)} LLM cache entries")
+        return len(docs)
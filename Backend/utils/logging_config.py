@@ -1,14 +1,41 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 
+_queue_listener: logging.handlers.QueueListener | None = None
 
-def configure_logging(service_name: str | None = None) -> logging.Logger:
+
+def _install_queue_logging(level: int, fmt: str) -> None:
+    """Route root logging through a QueueHandler; a listener thread does the I/O."""
+    global _queue_listener
+    if _queue_listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(fmt))
+    log_queue = queue.SimpleQueue()
+    _queue_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _queue_listener.start()
+    atexit.register(_queue_listener.stop)
+
+    # QueueHandler.prepare() merges args into the message; the listener's
+    # handler applies the real format
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level=level, handlers=[queue_handler], force=True)
+
+
+def configure_logging(service_name: str | None = None, use_queue: bool = False) -> logging.Logger:
     """
     Configure a consistent logging format across services.
 
     - Uses LOG_LEVEL env var (default INFO)
     - Includes service name in the log format if provided
     - Avoids printing secrets by design (business code should not log secrets)
+    - use_queue=True moves log I/O off the calling (request) thread via a
+      QueueHandler + QueueListener
     """
     level_str = os.getenv("LOG_LEVEL", "INFO").upper()
     level = getattr(logging, level_str, logging.INFO)
@@ -19,8 +46,10 @@ def configure_logging(service_name: str | None = None) -> logging.Logger:
         else f"%(asctime)s | %(levelname)s | {service_name} | %(name)s | %(message)s"
     )
 
-    logging.basicConfig(level=level, format=base_fmt)
+    if use_queue:
+        _install_queue_logging(level, base_fmt)
+    else:
+        logging.basicConfig(level=level, format=base_fmt)
     logger = logging.getLogger(service_name or __name__)
     logger.setLevel(level)
     return logger
-
@@ -560,6 +560,7 @@ export default function Summarizer() {
       const reader = response.body.getReader();
       const decoder = new TextDecoder();
       let accumulatedContent = "";
+      let pendingLine = "";
       let hasReceivedContent = false;
 
       // Process the stream
@@ -574,8 +575,10 @@ export default function Summarizer() {
           break;
         }
 
-        const chunk = decoder.decode(value, { stream: true });
+        // A read can end mid-line; keep the partial tail for the next chunk
+        const chunk = pendingLine + decoder.decode(value, { stream: true });
         const lines = chunk.split('\n');
+        pendingLine = lines.pop();
 
         for (const line of lines) {
           if (line.trim()) {